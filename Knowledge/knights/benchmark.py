@@ -0,0 +1,388 @@
+"""
+Benchmarks for entailment checking on generated knights and knaves
+puzzles.
+
+Usage: python benchmark.py [sat|compile|table|intern|batch|incremental] [seed]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+import logic
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+from logic import ENTAILED, intern, model_check, model_check_all
+from compiled import compile_sentence, compiled_model_check, pack
+from sat import KnowledgeBase, sat_check, sat_check_all
+
+# Inhabitants per puzzle, and the largest puzzle model_check is run on
+SAT_SIZES = [2, 4, 6, 8, 16, 32, 64, 128, 256]
+MODEL_CHECK_SIZES = [2, 4, 6, 8]
+
+COMPILE_SIZES = [4, 16, 64]
+COMPILE_MODELS = 2000
+COMPILE_MODEL_CHECK_SIZE = 8
+
+# Puzzles checked by truth table, and by recursive enumeration too
+TABLE_SIZES = [4, 6, 8, 10, 12]
+RECURSIVE_SIZES = [4, 6, 8]
+
+# Puzzles interned, the copies of each combined, and the symbols queried
+INTERN_SIZES = [16, 64, 256]
+INTERN_COPIES = 20
+INTERN_QUERIES = 8
+
+# Puzzles checked a query at a time and all at once, by truth table
+# and by the SAT solver
+BATCH_TABLE_SIZES = [4, 8, 12]
+BATCH_SAT_SIZES = [16, 64, 256]
+
+# Puzzles whose knowledge is added a sentence at a time
+INCREMENTAL_SIZES = [8, 16, 32]
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py "
+                 "[sat|compile|table|intern|batch|incremental] [seed]")
+    suite = sys.argv[1] if len(sys.argv) > 1 else "sat"
+    seed = int(sys.argv[2]) if len(sys.argv) == 3 else 0
+    random.seed(seed)
+
+    if suite == "sat":
+        benchmark_sat()
+    elif suite == "compile":
+        benchmark_compile()
+    elif suite == "table":
+        benchmark_table()
+    elif suite == "intern":
+        benchmark_intern()
+    elif suite == "batch":
+        benchmark_batch()
+    elif suite == "incremental":
+        benchmark_incremental()
+    else:
+        sys.exit(f"Unknown benchmark: {suite}")
+
+
+def generate_puzzle(size):
+    """
+    Returns (symbols, knowledge, truth) for a random puzzle with size
+    inhabitants, each a knight or a knave, who each make one or two
+    statements about themselves or others. Knights' statements are
+    true and knaves' false in the hidden solution truth, which maps
+    each symbol to its value.
+    """
+    knights = [Symbol(f"{i} is a Knight") for i in range(size)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(size)]
+    is_knight = [random.random() < 0.5 for _ in range(size)]
+    truth = {}
+    for i in range(size):
+        truth[knights[i]] = is_knight[i]
+        truth[knaves[i]] = not is_knight[i]
+
+    knowledge = And()
+    for i in range(size):
+        knowledge.add(Or(knights[i], knaves[i]))
+        knowledge.add(Not(And(knights[i], knaves[i])))
+
+    for i in range(size):
+        for _ in range(random.randint(1, 2)):
+            x = random.randrange(size)
+            y = random.randrange(size)
+            statement = random.choice([
+                knights[x],
+                knaves[x],
+                Biconditional(knights[x], knights[y]),
+                Or(knaves[x], knaves[y]),
+                And(knights[x], knaves[y]),
+                Implication(knights[x], knaves[y])
+            ])
+            if statement.evaluate(
+                {symbol.name: value for symbol, value in truth.items()}
+            ) != is_knight[i]:
+                statement = Not(statement)
+            knowledge.add(Biconditional(knights[i], statement))
+
+    return knights + knaves, knowledge, truth
+
+
+def check_puzzle(check, symbols, knowledge):
+    """
+    Returns the symbols check finds knowledge entails, and the seconds
+    taken per query.
+    """
+    start = time.perf_counter()
+    entailed = [symbol for symbol in symbols if check(knowledge, symbol)]
+    return entailed, (time.perf_counter() - start) / len(symbols)
+
+
+def benchmark_sat():
+    """
+    Compares model_check and sat_check answering whether each symbol
+    of puzzles of increasing size is entailed, exiting if they
+    disagree or if the SAT solver entails a symbol false in the
+    hidden solution.
+    """
+    print(f"{'people':>7} {'symbols':>8} {'solved':>7} "
+          f"{'model_check ms':>15} {'sat_check ms':>13}")
+    for size in SAT_SIZES:
+        symbols, knowledge, truth = generate_puzzle(size)
+        entailed, sat_seconds = check_puzzle(sat_check, symbols, knowledge)
+        if any(not truth[symbol] for symbol in entailed):
+            sys.exit("sat_check entailed a false symbol.")
+
+        model_check_ms = ""
+        if size in MODEL_CHECK_SIZES:
+            expected, seconds = check_puzzle(model_check, symbols, knowledge)
+            if expected != entailed:
+                sys.exit("sat_check and model_check disagree.")
+            model_check_ms = f"{1000 * seconds:.2f}"
+
+        print(f"{size:>7} {len(symbols):>8} {len(entailed):>7} "
+              f"{model_check_ms:>15} {1000 * sat_seconds:>13.2f}")
+
+
+def benchmark_compile():
+    """
+    Compares evaluations per second of Sentence.evaluate on dictionary
+    models against compiled sentences on bit-packed models, for the
+    knowledge of puzzles of increasing size, then times model_check
+    against compiled_model_check. Exits if results differ.
+    """
+    print(f"{'people':>7} {'symbols':>8} {'compile ms':>11} "
+          f"{'tree eval/s':>12} {'compiled eval/s':>16} {'speedup':>8}")
+    for size in COMPILE_SIZES:
+        symbols, knowledge, _ = generate_puzzle(size)
+        names = [symbol.name for symbol in symbols]
+        models = [
+            {name: random.random() < 0.5 for name in names}
+            for _ in range(COMPILE_MODELS)
+        ]
+        packed = [pack(model, names) for model in models]
+
+        start = time.perf_counter()
+        compiled = compile_sentence(knowledge, names)
+        compile_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [knowledge.evaluate(model) for model in models]
+        tree_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = [compiled(model) for model in packed]
+        compiled_seconds = time.perf_counter() - start
+
+        if results != expected:
+            sys.exit("Compiled and tree evaluation differ.")
+        print(f"{size:>7} {len(symbols):>8} {1000 * compile_seconds:>11.2f} "
+              f"{len(models) / tree_seconds:>12.0f} "
+              f"{len(models) / compiled_seconds:>16.0f} "
+              f"{tree_seconds / compiled_seconds:>7.1f}x")
+
+    symbols, knowledge, _ = generate_puzzle(COMPILE_MODEL_CHECK_SIZE)
+    print(f"\n{'check':>20} {'ms/query':>9}")
+    answers = []
+    for name, check in [("model_check", model_check),
+                        ("compiled_model_check", compiled_model_check)]:
+        entailed, seconds = check_puzzle(check, symbols, knowledge)
+        answers.append(entailed)
+        print(f"{name:>20} {1000 * seconds:>9.2f}")
+    if answers[0] != answers[1]:
+        sys.exit("compiled_model_check and model_check disagree.")
+
+
+def recursive_model_check(knowledge, query):
+    """Runs model_check with truth tables turned off."""
+    max_table_symbols = logic.MAX_TABLE_SYMBOLS
+    logic.MAX_TABLE_SYMBOLS = -1
+    try:
+        return model_check(knowledge, query)
+    finally:
+        logic.MAX_TABLE_SYMBOLS = max_table_symbols
+
+
+def benchmark_table():
+    """
+    Compares model_check enumerating models recursively against
+    evaluating bit vector truth tables on puzzles of increasing size,
+    exiting if they disagree.
+    """
+    print(f"{'people':>7} {'symbols':>8} {'recursive ms':>13} "
+          f"{'table ms':>9}")
+    for size in TABLE_SIZES:
+        symbols, knowledge, _ = generate_puzzle(size)
+        entailed, table_seconds = check_puzzle(model_check, symbols,
+                                               knowledge)
+
+        recursive_ms = ""
+        if size in RECURSIVE_SIZES:
+            expected, seconds = check_puzzle(recursive_model_check,
+                                             symbols, knowledge)
+            if expected != entailed:
+                sys.exit("Truth table and recursive model_check disagree.")
+            recursive_ms = f"{1000 * seconds:.2f}"
+
+        print(f"{size:>7} {len(symbols):>8} {recursive_ms:>13} "
+              f"{1000 * table_seconds:>9.2f}")
+
+
+def count_nodes(sentence, seen=None):
+    """Returns the number of distinct objects sentence is made of."""
+    if seen is None:
+        seen = set()
+    if id(sentence) in seen:
+        return 0
+    seen.add(id(sentence))
+    if isinstance(sentence, Symbol):
+        return 1
+    if isinstance(sentence, Not):
+        parts = [sentence.operand]
+    elif isinstance(sentence, And):
+        parts = sentence.conjuncts
+    elif isinstance(sentence, Or):
+        parts = sentence.disjuncts
+    elif isinstance(sentence, Implication):
+        parts = [sentence.antecedent, sentence.consequent]
+    else:
+        parts = [sentence.left, sentence.right]
+    return 1 + sum(count_nodes(part, seen) for part in parts)
+
+
+def build_knowledge(size, interned):
+    """
+    Returns the knowledge of INTERN_COPIES copies of a puzzle of size
+    inhabitants, each regenerated from the same seed as a new tree, and
+    the bytes allocated to it.
+    """
+    seed = random.random()
+    tracemalloc.start()
+    try:
+        knowledge = And()
+        for _ in range(INTERN_COPIES):
+            random.seed(seed)
+            _, puzzle, _ = generate_puzzle(size)
+            knowledge.add(intern(puzzle) if interned else puzzle)
+        if interned:
+            knowledge = intern(knowledge)
+        memory, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return knowledge, memory
+
+
+def benchmark_intern():
+    """
+    Compares plain and interned knowledge bases made of repeated
+    puzzles: objects, memory, hashing and collecting symbols first and
+    once cached, and sat_check on the first INTERN_QUERIES symbols.
+    Exits if the answers differ.
+    """
+    print(f"{'people':>7} {'kind':>9} {'objects':>8} {'KiB':>8} "
+          f"{'hash ms':>8} {'rehash ms':>10} {'symbols ms':>11} "
+          f"{'sat ms':>8}")
+    for size in INTERN_SIZES:
+        state = random.getstate()
+        answers = []
+        for interned in [False, True]:
+            random.setstate(state)
+            knowledge, memory = build_knowledge(size, interned)
+
+            start = time.perf_counter()
+            hash(knowledge)
+            hash_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            hash(knowledge)
+            rehash_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            symbols = knowledge.symbols()
+            symbols_seconds = time.perf_counter() - start
+
+            queries = [Symbol(name)
+                       for name in sorted(symbols)[:INTERN_QUERIES]]
+            entailed, sat_seconds = check_puzzle(sat_check, queries,
+                                                 knowledge)
+            answers.append(entailed)
+
+            kind = "interned" if interned else "plain"
+            print(f"{size:>7} {kind:>9} {count_nodes(knowledge):>8} "
+                  f"{memory / 1024:>8.0f} {1000 * hash_seconds:>8.3f} "
+                  f"{1000 * rehash_seconds:>10.3f} "
+                  f"{1000 * symbols_seconds:>11.3f} "
+                  f"{1000 * len(queries) * sat_seconds:>8.1f}")
+        if answers[0] != answers[1]:
+            sys.exit("Plain and interned knowledge disagree.")
+
+
+def benchmark_batch():
+    """
+    Compares checking each symbol of puzzles of increasing size one
+    query at a time against checking them all in one batch, by truth
+    table and by the SAT solver, exiting if the entailed symbols
+    differ.
+    """
+    print(f"{'check':>6} {'people':>7} {'symbols':>8} {'solved':>7} "
+          f"{'single ms':>10} {'batch ms':>9} {'speedup':>8}")
+    for name, single, batch, sizes in [
+        ("table", model_check, model_check_all, BATCH_TABLE_SIZES),
+        ("sat", sat_check, sat_check_all, BATCH_SAT_SIZES)
+    ]:
+        for size in sizes:
+            symbols, knowledge, _ = generate_puzzle(size)
+            expected, seconds = check_puzzle(single, symbols, knowledge)
+            single_seconds = len(symbols) * seconds
+
+            start = time.perf_counter()
+            answers = batch(knowledge, symbols)
+            batch_seconds = time.perf_counter() - start
+
+            entailed = [symbol for symbol in symbols
+                        if answers[symbol] == ENTAILED]
+            if entailed != expected:
+                sys.exit(f"Batch and single {name} checks disagree.")
+            print(f"{name:>6} {size:>7} {len(symbols):>8} "
+                  f"{len(entailed):>7} {1000 * single_seconds:>10.2f} "
+                  f"{1000 * batch_seconds:>9.2f} "
+                  f"{single_seconds / batch_seconds:>7.1f}x")
+
+
+def benchmark_incremental():
+    """
+    Adds the knowledge of puzzles of increasing size a sentence at a
+    time, checking every symbol after each addition, both from scratch
+    with sat_check and with one KnowledgeBase. Exits if they disagree.
+    """
+    print(f"{'people':>7} {'sentences':>10} {'queries':>8} "
+          f"{'scratch ms':>11} {'incremental ms':>15} {'speedup':>8}")
+    for size in INCREMENTAL_SIZES:
+        symbols, knowledge, _ = generate_puzzle(size)
+        sentences = knowledge.conjuncts
+
+        expected = []
+        start = time.perf_counter()
+        for i in range(1, len(sentences) + 1):
+            so_far = And(*sentences[:i])
+            expected.append([sat_check(so_far, symbol) for symbol in symbols])
+        scratch_seconds = time.perf_counter() - start
+
+        answers = []
+        start = time.perf_counter()
+        kb = KnowledgeBase()
+        for sentence in sentences:
+            kb.add(sentence)
+            answers.append([kb.entails(symbol) for symbol in symbols])
+        incremental_seconds = time.perf_counter() - start
+
+        if answers != expected:
+            sys.exit("KnowledgeBase and sat_check disagree.")
+        print(f"{size:>7} {len(sentences):>10} "
+              f"{len(sentences) * len(symbols):>8} "
+              f"{1000 * scratch_seconds:>11.1f} "
+              f"{1000 * incremental_seconds:>15.1f} "
+              f"{scratch_seconds / incremental_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Compiled evaluation of logical sentences.
+
+compile_sentence turns a Sentence into a Python function of one
+integer, a bit-packed model in which bit i holds the value of the ith
+symbol. The function is generated as a single Python expression of
+bit tests and boolean operators, so evaluating it makes no method calls
+and no dictionary lookups. Sentences nested too deeply for the Python
+parser are compiled to nested closures instead.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Deepest sentence compiled to a generated expression
+MAX_EXPRESSION_DEPTH = 50
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Returns a function of a bit-packed model that evaluates sentence,
+    where symbols lists the names of the symbols in bit order.
+    """
+    bits = {name: 1 << i for i, name in enumerate(symbols)}
+    for name in sentence.symbols():
+        if name not in bits:
+            raise Exception(f"variable {name} not in model")
+
+    if depth(sentence) > MAX_EXPRESSION_DEPTH:
+        return closure(sentence, bits)
+    source = f"lambda m: bool({expression(sentence, bits)})"
+    return eval(compile(source, "<sentence>", "eval"))
+
+
+def depth(sentence):
+    """Returns the number of levels of nesting in sentence."""
+    if isinstance(sentence, Symbol):
+        return 1
+    return 1 + max((depth(part) for part in parts(sentence)), default=0)
+
+
+def parts(sentence):
+    """Returns the subsentences a sentence is made of."""
+    if isinstance(sentence, Not):
+        return [sentence.operand]
+    if isinstance(sentence, And):
+        return sentence.conjuncts
+    if isinstance(sentence, Or):
+        return sentence.disjuncts
+    if isinstance(sentence, Implication):
+        return [sentence.antecedent, sentence.consequent]
+    if isinstance(sentence, Biconditional):
+        return [sentence.left, sentence.right]
+    return []
+
+
+def expression(sentence, bits):
+    """
+    Returns Python source for an expression, in the model m, with the
+    truth of sentence.
+    """
+    if isinstance(sentence, Symbol):
+        return f"m & {bits[sentence.name]}"
+    if isinstance(sentence, Not):
+        return f"not ({expression(sentence.operand, bits)})"
+    if isinstance(sentence, And):
+        if not sentence.conjuncts:
+            return "True"
+        return " and ".join(f"({expression(conjunct, bits)})"
+                            for conjunct in sentence.conjuncts)
+    if isinstance(sentence, Or):
+        if not sentence.disjuncts:
+            return "False"
+        return " or ".join(f"({expression(disjunct, bits)})"
+                           for disjunct in sentence.disjuncts)
+    if isinstance(sentence, Implication):
+        return (f"not ({expression(sentence.antecedent, bits)}) "
+                f"or ({expression(sentence.consequent, bits)})")
+    if isinstance(sentence, Biconditional):
+        return (f"(not ({expression(sentence.left, bits)})) == "
+                f"(not ({expression(sentence.right, bits)}))")
+    raise TypeError("must be a logical sentence")
+
+
+def closure(sentence, bits):
+    """
+    Returns a function of a bit-packed model that evaluates sentence
+    by calling one closure per subsentence.
+    """
+    if isinstance(sentence, Symbol):
+        bit = bits[sentence.name]
+        return lambda m: m & bit != 0
+    if isinstance(sentence, Not):
+        operand = closure(sentence.operand, bits)
+        return lambda m: not operand(m)
+    if isinstance(sentence, And):
+        conjuncts = [closure(conjunct, bits)
+                     for conjunct in sentence.conjuncts]
+        return lambda m: all(conjunct(m) for conjunct in conjuncts)
+    if isinstance(sentence, Or):
+        disjuncts = [closure(disjunct, bits)
+                     for disjunct in sentence.disjuncts]
+        return lambda m: any(disjunct(m) for disjunct in disjuncts)
+    if isinstance(sentence, Implication):
+        antecedent = closure(sentence.antecedent, bits)
+        consequent = closure(sentence.consequent, bits)
+        return lambda m: not antecedent(m) or consequent(m)
+    if isinstance(sentence, Biconditional):
+        left = closure(sentence.left, bits)
+        right = closure(sentence.right, bits)
+        return lambda m: left(m) == right(m)
+    raise TypeError("must be a logical sentence")
+
+
+def pack(model, symbols):
+    """
+    Returns the bit-packed form of a model, a dictionary mapping
+    symbol names to values, for symbols in bit order.
+    """
+    packed = 0
+    for i, name in enumerate(symbols):
+        if model[name]:
+            packed |= 1 << i
+    return packed
+
+
+def compiled_model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, enumerating bit-packed
+    models with compiled sentences.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge = compile_sentence(knowledge, symbols)
+    query = compile_sentence(query, symbols)
+    return all(query(m) for m in range(2 ** len(symbols)) if knowledge(m))
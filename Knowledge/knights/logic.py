@@ -1,7 +1,37 @@
 import itertools
+import weakref
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Most symbols for which model_check evaluates a whole truth table at
+# once, as bit vectors, instead of enumerating models one at a time
+MAX_TABLE_SYMBOLS = 25
+
+# 64-bit words of the truth table evaluated at a time
+TABLE_CHUNK_WORDS = 2 ** 14
+
+# Answers of model_check_all for each query
+ENTAILED = "entailed"
+CONTRADICTED = "contradicted"
+UNKNOWN = "unknown"
+
+# Sentences made by intern, keyed by type and the ids of their interned
+# parts, or by name for symbols
+interned = weakref.WeakValueDictionary()
 
 
 class Sentence():
+    # Whether the sentence is interned and may not change, and, only
+    # if so, its cached hash and frozenset of symbol names
+    __slots__ = ("_hash", "_symbols", "_interned", "__weakref__")
+
+    def __init__(self):
+        self._hash = None
+        self._symbols = None
+        self._interned = False
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +43,14 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    def symbol_set(self):
+        """
+        Returns a frozenset of all symbols in the logical sentence,
+        cached only if the sentence is interned.
+        """
+        return frozenset()
 
     @classmethod
     def validate(cls, sentence):
@@ -43,14 +80,20 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
     def __init__(self, name):
+        Sentence.__init__(self)
         self.name = name
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
     def __hash__(self):
+        if self._hash is not None:
+            return self._hash
         return hash(("symbol", self.name))
 
     def __repr__(self):
@@ -65,19 +108,28 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def symbol_set(self):
+        if self._symbols is not None:
+            return self._symbols
+        return frozenset([self.name])
 
 
 class Not(Sentence):
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
+        Sentence.__init__(self)
         Sentence.validate(operand)
         self.operand = operand
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand
+        )
 
     def __hash__(self):
+        if self._hash is not None:
+            return self._hash
         return hash(("not", hash(self.operand)))
 
     def __repr__(self):
@@ -89,20 +141,29 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def symbol_set(self):
+        if self._symbols is not None:
+            return self._symbols
+        return self.operand.symbol_set()
 
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
+        Sentence.__init__(self)
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
+        if self._hash is not None:
+            return self._hash
         return hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
         )
@@ -114,6 +175,8 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        if self._interned:
+            raise TypeError("cannot add to an interned sentence")
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
 
@@ -126,20 +189,31 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def symbol_set(self):
+        if self._symbols is not None:
+            return self._symbols
+        return frozenset().union(
+            *[conjunct.symbol_set() for conjunct in self.conjuncts]
+        )
 
 
 class Or(Sentence):
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
+        Sentence.__init__(self)
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
+        if self._hash is not None:
+            return self._hash
         return hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
         )
@@ -157,24 +231,37 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def symbol_set(self):
+        if self._symbols is not None:
+            return self._symbols
+        return frozenset().union(
+            *[disjunct.symbol_set() for disjunct in self.disjuncts]
+        )
 
 
 class Implication(Sentence):
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
+        Sentence.__init__(self)
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
         self.antecedent = antecedent
         self.consequent = consequent
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        if self._hash is not None:
+            return self._hash
+        return hash(
+            ("implies", hash(self.antecedent), hash(self.consequent))
+        )
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +275,35 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def symbol_set(self):
+        if self._symbols is not None:
+            return self._symbols
+        return self.antecedent.symbol_set() | self.consequent.symbol_set()
 
 
 class Biconditional(Sentence):
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
+        Sentence.__init__(self)
         Sentence.validate(left)
         Sentence.validate(right)
         self.left = left
         self.right = right
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional)
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        if self._hash is not None:
+            return self._hash
+        return hash(
+            ("biconditional", hash(self.left), hash(self.right))
+        )
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,8 +319,53 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def symbol_set(self):
+        if self._symbols is not None:
+            return self._symbols
+        return self.left.symbol_set() | self.right.symbol_set()
+
+
+def intern(sentence):
+    """
+    Returns the interned copy of sentence: made of interned copies of
+    its parts, shared by every equal sentence interned, and unable to
+    change, so it caches its hash and symbols. Interning a knowledge
+    base stores each distinct subsentence once.
+
+    Sentences that are not interned may still change, so they work out
+    their hash and symbols on every call. model_check and the other
+    checks do not intern their inputs: intern a knowledge base to get
+    the caching.
+    """
+    if sentence._interned:
+        return sentence
+
+    if isinstance(sentence, Symbol):
+        key = (Symbol, sentence.name)
+        parts = [sentence.name]
+    elif isinstance(sentence, Not):
+        parts = [intern(sentence.operand)]
+    elif isinstance(sentence, And):
+        parts = [intern(conjunct) for conjunct in sentence.conjuncts]
+    elif isinstance(sentence, Or):
+        parts = [intern(disjunct) for disjunct in sentence.disjuncts]
+    elif isinstance(sentence, Implication):
+        parts = [intern(sentence.antecedent), intern(sentence.consequent)]
+    elif isinstance(sentence, Biconditional):
+        parts = [intern(sentence.left), intern(sentence.right)]
+    else:
+        raise TypeError("must be a logical sentence")
+    if not isinstance(sentence, Symbol):
+        key = (type(sentence), tuple(id(part) for part in parts))
+
+    node = interned.get(key)
+    if node is None:
+        node = type(sentence)(*parts)
+        node._interned = True
+        node._hash = hash(node)
+        node._symbols = node.symbol_set()
+        interned[key] = node
+    return node
 
 
 def model_check(knowledge, query):
@@ -259,5 +402,161 @@ def model_check(knowledge, query):
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
+    # Check every model at once if the truth table is small enough
+    if np is not None and len(symbols) <= MAX_TABLE_SYMBOLS:
+        return table_check(knowledge, query, sorted(symbols))
+
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def model_check_all(knowledge, queries):
+    """
+    Checks knowledge base against every query at once. Returns a
+    dictionary mapping each query to ENTAILED if knowledge entails it,
+    CONTRADICTED if knowledge entails its negation, or UNKNOWN if some
+    models of knowledge make it true and others false. Like model_check,
+    an unsatisfiable knowledge base entails every query.
+    """
+    queries = list(queries)
+    symbols = knowledge.symbols()
+    for query in queries:
+        symbols |= query.symbols()
+    symbols = sorted(symbols)
+
+    # Whether some model of knowledge makes each query true, and false
+    if np is not None and len(symbols) <= MAX_TABLE_SYMBOLS:
+        possible = table_check_all(knowledge, queries, symbols)
+    else:
+        possible = {query: [False, False] for query in queries}
+        undecided = set(queries)
+        for values in itertools.product([True, False], repeat=len(symbols)):
+            model = dict(zip(symbols, values))
+            if not knowledge.evaluate(model):
+                continue
+            for query in list(undecided):
+                if query.evaluate(model):
+                    possible[query][0] = True
+                else:
+                    possible[query][1] = True
+                if all(possible[query]):
+                    undecided.remove(query)
+            if not undecided:
+                break
+
+    return {query: answer(*possible[query]) for query in queries}
+
+
+def answer(can_be_true, can_be_false):
+    """
+    Returns the answer for a query given whether some model of the
+    knowledge base makes it true, and whether some makes it false.
+    """
+    if not can_be_false:
+        return ENTAILED
+    if not can_be_true:
+        return CONTRADICTED
+    return UNKNOWN
+
+
+def table_check_all(knowledge, queries, symbols):
+    """
+    Returns a dictionary mapping each query to a pair of whether some
+    model of knowledge makes it true, and whether some makes it false,
+    evaluating the truth table of knowledge once per chunk for every
+    query.
+    """
+    possible = {query: [False, False] for query in queries}
+    for columns, ones, valid in table_chunks(symbols):
+        models = truth_table(knowledge, columns, ones) & valid
+        if not np.any(models):
+            continue
+        for query in queries:
+            if all(possible[query]):
+                continue
+            table = truth_table(query, columns, ones)
+            if np.any(models & table):
+                possible[query][0] = True
+            if np.any(models & ~table):
+                possible[query][1] = True
+    return possible
+
+
+def table_check(knowledge, query, symbols):
+    """
+    Checks if knowledge base entails query by evaluating both over the
+    truth table of symbols, a chunk of 64-bit words at a time.
+    """
+    for columns, ones, valid in table_chunks(symbols):
+        counterexamples = (truth_table(knowledge, columns, ones)
+                           & ~truth_table(query, columns, ones) & valid)
+        if np.any(counterexamples):
+            return False
+    return True
+
+
+def table_chunks(symbols):
+    """
+    Yields (columns, ones, valid) for each chunk of the truth table of
+    symbols: the bit vector of each symbol, an all-true vector, and the
+    bits standing for models. Bit j of word w stands for model
+    64 * w + j, in which symbol i is true if bit i of the model's number
+    is set.
+    """
+    words = max(1, 2 ** len(symbols) // 64)
+    all_set = np.uint64(2 ** 64 - 1)
+
+    # Fewer than 64 models use only the low bits of one word
+    valid = all_set
+    if len(symbols) < 6:
+        valid = np.uint64(2 ** 2 ** len(symbols) - 1)
+
+    # Symbols 0 to 5 repeat the same pattern in every word
+    patterns = [
+        np.uint64(sum(1 << j for j in range(64) if j >> i & 1))
+        for i in range(6)
+    ]
+
+    for start in range(0, words, TABLE_CHUNK_WORDS):
+        index = np.arange(start, min(words, start + TABLE_CHUNK_WORDS),
+                          dtype=np.uint64)
+        columns = {}
+        for i, name in enumerate(symbols):
+            if i < 6:
+                columns[name] = np.full(len(index), patterns[i])
+            else:
+                columns[name] = np.where(
+                    (index >> np.uint64(i - 6)) & np.uint64(1),
+                    all_set, np.uint64(0)
+                )
+
+        yield columns, np.full(len(index), all_set), valid
+
+
+def truth_table(sentence, columns, ones):
+    """
+    Returns the bit vector of the models in which sentence is true,
+    given the bit vectors of its symbols in columns and an all-true
+    vector ones.
+    """
+    if isinstance(sentence, Symbol):
+        return columns[sentence.name]
+    if isinstance(sentence, Not):
+        return ~truth_table(sentence.operand, columns, ones)
+    if isinstance(sentence, And):
+        result = ones
+        for conjunct in sentence.conjuncts:
+            result = result & truth_table(conjunct, columns, ones)
+        return result
+    if isinstance(sentence, Or):
+        result = ~ones
+        for disjunct in sentence.disjuncts:
+            result = result | truth_table(disjunct, columns, ones)
+        return result
+    if isinstance(sentence, Implication):
+        return (~truth_table(sentence.antecedent, columns, ones)
+                | truth_table(sentence.consequent, columns, ones))
+    if isinstance(sentence, Biconditional):
+        return ~(truth_table(sentence.left, columns, ones)
+                 ^ truth_table(sentence.right, columns, ones))
+    raise Exception("nothing to evaluate")
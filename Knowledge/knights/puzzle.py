@@ -85,8 +85,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
+            answers = model_check_all(knowledge, symbols)
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if answers[symbol] == ENTAILED:
                     print(f"    {symbol}")
 
 
@@ -0,0 +1,526 @@
+"""
+Entailment by satisfiability: a drop-in alternative to model_check.
+
+Sentences are converted to clauses by the Tseitin transformation: every
+compound subsentence gets a new variable, with clauses making it
+equivalent to its parts, so the clauses grow linearly with the
+sentence. The knowledge base entails a query if the clauses of the
+knowledge base are unsatisfiable once the query is assumed false.
+
+Satisfiability is decided by conflict-driven clause learning (CDCL):
+unit propagation over two watched literals per clause, a clause learned
+from the first unique implication point of every conflict, backjumping,
+activity-ordered decisions with saved phases, and Luby restarts.
+
+Literals are nonzero integers: variable v is the literal v, and its
+negation is -v.
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Sentence, Symbol
+from logic import CONTRADICTED, ENTAILED, UNKNOWN, answer
+
+# Conflicts in one unit of the Luby restart sequence
+RESTART_INTERVAL = 100
+
+# Variable activity decay per conflict
+ACTIVITY_DECAY = 0.95
+
+# Models a KnowledgeBase keeps to answer queries without solving
+KEPT_MODELS = 32
+
+
+class Solver():
+    def __init__(self):
+        self.num_variables = 0
+
+        # Per variable, indexed from 1: assigned value or None, decision
+        # level, clause that implied it (None for decisions), activity
+        # and last value for phase saving
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+
+        # Maps each literal to the clauses watching it: those whose
+        # first or second literal it is
+        self.watches = {}
+
+        # Assigned literals in order, and the trail length at the start
+        # of each decision level
+        self.trail = []
+        self.trail_levels = []
+        self.propagated = 0
+
+        # Unassigned variables by activity, with stale entries skipped
+        self.order = []
+        self.increment = 1.0
+
+        self.learned = []
+        self.conflicts = 0
+
+        # Set once the clauses are unsatisfiable without assumptions
+        self.unsatisfiable = False
+
+    def new_variable(self):
+        """Returns a new variable."""
+        self.num_variables += 1
+        self.values.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(False)
+        heapq.heappush(self.order, (0.0, self.num_variables))
+        return self.num_variables
+
+    def value(self, literal):
+        """Returns True or False for an assigned literal, else None."""
+        value = self.values[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def add_clause(self, literals):
+        """
+        Adds a clause, a disjunction of literals. Returns False if the
+        clauses have become unsatisfiable.
+        """
+        self.backtrack(0)
+        clause = []
+        for literal in literals:
+            value = self.value(literal)
+            if value is True or -literal in clause:
+                return not self.unsatisfiable
+            if value is None and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.watch(clause)
+        return not self.unsatisfiable
+
+    def watch(self, clause):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.trail_levels)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses. Returns a clause
+        all of whose literals are false, or None if there is none.
+        """
+        values = self.values
+        while self.propagated < len(self.trail):
+            false_literal = -self.trail[self.propagated]
+            self.propagated += 1
+            watchers = self.watches.get(false_literal)
+            if not watchers:
+                continue
+
+            kept = []
+            for i, clause in enumerate(watchers):
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                value = values[abs(first)]
+                if value is not None and value == (first > 0):
+                    kept.append(clause)
+                    continue
+
+                # Watch another literal that is not false, if any
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    value = values[abs(literal)]
+                    if value is None or value == (literal > 0):
+                        clause[1], clause[k] = literal, false_literal
+                        self.watches.setdefault(literal, []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if values[abs(first)] is None:
+                        self.assign(first, clause)
+                    else:
+                        kept.extend(watchers[i + 1:])
+                        self.watches[false_literal] = kept
+                        return clause
+            self.watches[false_literal] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, asserting at its
+        first unique implication point, and the level to backjump to.
+        """
+        level = len(self.trail_levels)
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for other in clause[0 if literal is None else 1:]:
+                variable = abs(other)
+                if variable not in seen and self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.levels[variable] == level:
+                        pending += 1
+                    else:
+                        learned.append(other)
+
+            # Resolve on the latest assigned literal in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal from the highest remaining level second
+        highest = max(range(1, len(learned)),
+                      key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[highest] = learned[highest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[v], v)
+                          for v in range(1, self.num_variables + 1)
+                          if self.values[v] is None]
+            heapq.heapify(self.order)
+        elif self.values[variable] is None:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        """Unassigns every literal above a decision level."""
+        if len(self.trail_levels) <= level:
+            return
+        start = self.trail_levels[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = None
+            self.reasons[variable] = None
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_levels[level:]
+        self.propagated = min(self.propagated, start)
+
+    def decide(self):
+        """
+        Returns the unassigned variable with the highest activity, or
+        None if every variable is assigned.
+        """
+        while self.order:
+            activity, variable = heapq.heappop(self.order)
+            if (self.values[variable] is None
+                    and -activity == self.activity[variable]):
+                return variable
+        for variable in range(1, self.num_variables + 1):
+            if self.values[variable] is None:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses can all be satisfied with every
+        literal in assumptions true, leaving a satisfying assignment in
+        place for model(), or False if not.
+        """
+        if self.unsatisfiable:
+            return False
+        self.backtrack(0)
+        if self.propagate() is not None:
+            self.unsatisfiable = True
+            return False
+
+        restarts = 0
+        limit = RESTART_INTERVAL * luby(restarts)
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.trail_levels:
+                    self.unsatisfiable = True
+                    return False
+                self.conflicts += 1
+                conflicts += 1
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.watch(learned)
+                    self.learned.append(learned)
+                    self.assign(learned[0], learned)
+                self.increment /= ACTIVITY_DECAY
+                continue
+
+            if conflicts >= limit:
+                restarts += 1
+                limit = RESTART_INTERVAL * luby(restarts)
+                conflicts = 0
+                self.backtrack(0)
+                continue
+
+            # Assume each assumption in turn, one level each
+            level = len(self.trail_levels)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value is False:
+                    return False
+                self.trail_levels.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                return True
+            self.trail_levels.append(len(self.trail))
+            self.assign(variable if self.phases[variable] else -variable,
+                        None)
+
+    def model(self):
+        """
+        Returns the values of every variable after a successful solve,
+        as a list indexed from 1.
+        """
+        return list(self.values)
+
+
+def luby(i):
+    """Returns the ith term, from 0, of the Luby sequence 1 1 2 1 1 2 4."""
+    size = 1
+    power = 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        power -= 1
+        i = i % size
+    return 2 ** power
+
+
+class Encoder():
+    """
+    Adds the Tseitin clauses of sentences to a Solver. Each symbol and
+    each distinct compound subsentence becomes one variable.
+    """
+
+    def __init__(self, solver):
+        self.solver = solver
+
+        # Maps symbol names to variables
+        self.variables = {}
+
+        # Maps compound sentences already encoded to their literals
+        self.literals = {}
+
+    def variable(self, name):
+        """Returns the variable for a symbol name."""
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_variable()
+        return self.variables[name]
+
+    def add(self, sentence):
+        """
+        Adds clauses making sentence true. Returns False if the clauses
+        have become unsatisfiable.
+        """
+        if isinstance(sentence, And):
+            return all([self.add(conjunct) for conjunct in sentence.conjuncts])
+        if isinstance(sentence, Or):
+            return self.solver.add_clause(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        if isinstance(sentence, Implication):
+            return self.solver.add_clause([
+                -self.literal(sentence.antecedent),
+                self.literal(sentence.consequent)
+            ])
+        return self.solver.add_clause([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to sentence, adding the clauses
+        defining it if it is new.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        add_clause = self.solver.add_clause
+        if isinstance(sentence, (And, Or)):
+            if isinstance(sentence, And):
+                parts = [self.literal(part) for part in sentence.conjuncts]
+            else:
+                parts = [-self.literal(part) for part in sentence.disjuncts]
+
+            # x <=> (a and b and ...), and by De Morgan, for or,
+            # -x <=> (-a and -b and ...)
+            x = self.solver.new_variable()
+            y = x if isinstance(sentence, And) else -x
+            for part in parts:
+                add_clause([-y, part])
+            add_clause([y] + [-part for part in parts])
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            x = self.solver.new_variable()
+            add_clause([-x, -a, b])
+            add_clause([x, a])
+            add_clause([x, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            x = self.solver.new_variable()
+            add_clause([-x, -a, b])
+            add_clause([-x, a, -b])
+            add_clause([x, a, b])
+            add_clause([x, -a, -b])
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.literals[sentence] = x
+        return x
+
+
+def sat_check(knowledge, query):
+    """Checks if knowledge base entails query."""
+    solver = Solver()
+    encoder = Encoder(solver)
+    if not encoder.add(knowledge):
+        return True
+    return not solver.solve([-encoder.literal(query)])
+
+
+def sat_check_all(knowledge, queries):
+    """
+    Checks knowledge base against every query at once, answering like
+    model_check_all. One solver holds the clauses of knowledge and of
+    every query, keeping what it learns between queries. Each model
+    found shows every query it makes true cannot be contradicted, and
+    every query it makes false cannot be entailed, so only queries not
+    yet settled by a model need a solve of their own.
+    """
+    queries = list(queries)
+    solver = Solver()
+    encoder = Encoder(solver)
+    if not encoder.add(knowledge):
+        return {query: ENTAILED for query in queries}
+    literals = {query: encoder.literal(query) for query in queries}
+    if not solver.solve():
+        return {query: ENTAILED for query in queries}
+
+    # Whether some model of knowledge makes each query true, and false
+    possible = {query: [False, False] for query in queries}
+
+    def record(model):
+        for query, literal in literals.items():
+            if model[abs(literal)] == (literal > 0):
+                possible[query][0] = True
+            else:
+                possible[query][1] = True
+
+    record(solver.model())
+    for query, literal in literals.items():
+        can_be_true, can_be_false = possible[query]
+        if not can_be_true and solver.solve([literal]):
+            record(solver.model())
+        elif not can_be_false and solver.solve([-literal]):
+            record(solver.model())
+
+    return {query: answer(*possible[query]) for query in queries}
+
+
+class KnowledgeBase():
+    """
+    A knowledge base that grows a sentence at a time, keeping its solver
+    between queries. Adding a sentence only adds clauses, so the clauses
+    the solver has learned stay valid; queries found entailed stay
+    entailed; and models found while answering queries are kept while
+    they satisfy every sentence added since, to show without solving
+    that queries they make false are not entailed.
+    """
+
+    def __init__(self, *sentences):
+        self.solver = Solver()
+        self.encoder = Encoder(self.solver)
+        self.sentences = []
+
+        # Queries known to be entailed
+        self.entailed = set()
+
+        # Models of every sentence added, mapping symbol names to values
+        self.models = []
+
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        self.encoder.add(sentence)
+        symbols = sentence.symbols()
+        self.models = [model for model in self.models
+                       if symbols <= model.keys() and sentence.evaluate(model)]
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        if query in self.entailed:
+            return True
+        symbols = query.symbols()
+        for model in self.models:
+            if symbols <= model.keys() and not query.evaluate(model):
+                return False
+
+        if self.solver.solve([-self.encoder.literal(query)]):
+            self.models.append({
+                name: self.solver.values[variable]
+                for name, variable in self.encoder.variables.items()
+            })
+            del self.models[:-KEPT_MODELS]
+            return False
+        self.entailed.add(query)
+        return True
+
+    def ask(self, query):
+        """
+        Returns ENTAILED, CONTRADICTED or UNKNOWN for query, like
+        model_check_all.
+        """
+        if self.entails(query):
+            return ENTAILED
+        if self.entails(Not(query)):
+            return CONTRADICTED
+        return UNKNOWN
@@ -0,0 +1,148 @@
+"""
+Answers many degrees-of-separation queries in one run.
+
+Usage: python batch.py [--compact] [--workers N] directory pairs [output]
+
+Each line of the pairs file holds two people, as names or person ids,
+separated by a comma. Names containing commas can be quoted as in CSV.
+Results are written as one JSON object per line, in input order, to
+the output file or to standard output.
+"""
+
+import csv
+import json
+import multiprocessing
+import sys
+
+import degrees
+
+
+def main():
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    workers = 1
+    if "--workers" in args:
+        i = args.index("--workers")
+        try:
+            workers = int(args[i + 1])
+        except (IndexError, ValueError):
+            sys.exit("--workers needs a number")
+        del args[i:i + 2]
+    if len(args) not in [2, 3]:
+        sys.exit("Usage: python batch.py [--compact] [--workers N] "
+                 "directory pairs [output]")
+    directory, pairs_file = args[0], args[1]
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(directory, compact)
+    print("Data loaded.", file=sys.stderr)
+
+    with open(pairs_file, encoding="utf-8") as f:
+        pairs = [row for row in csv.reader(f, skipinitialspace=True) if row]
+
+    results = answer_pairs(pairs, workers)
+
+    if len(args) == 3:
+        with open(args[2], "w", encoding="utf-8") as f:
+            write_results(results, f)
+    else:
+        write_results(results, sys.stdout)
+
+
+def write_results(results, f):
+    for result in results:
+        f.write(json.dumps(result) + "\n")
+
+
+def resolve(person):
+    """
+    Returns (person_id, error) for a name or person id, without
+    prompting when a name is ambiguous.
+    """
+    person = person.strip()
+    if person in degrees.people:
+        return person, None
+    person_ids = degrees.names.get(person.lower(), set())
+    if len(person_ids) == 0:
+        return None, f"Person not found: {person}"
+    elif len(person_ids) > 1:
+        candidates = ", ".join(sorted(person_ids))
+        return None, f"Ambiguous name: {person} ({candidates})"
+    return next(iter(person_ids)), None
+
+
+def answer_pairs(pairs, workers=1):
+    """
+    Returns one result dictionary per (source, target) pair, in order.
+
+    Pairs are grouped by source so each source is searched only once,
+    and independent sources are spread over a pool of worker processes
+    that share the loaded graph copy-on-write.
+    """
+    results = [None] * len(pairs)
+    groups = {}
+    for i, pair in enumerate(pairs):
+        if len(pair) != 2:
+            results[i] = {"pair": pair, "error": "Expected two people"}
+            continue
+        source, target = pair
+        source_id, source_error = resolve(source)
+        target_id, target_error = resolve(target)
+        results[i] = {
+            "source": source,
+            "target": target,
+            "source_id": source_id,
+            "target_id": target_id
+        }
+        if source_error or target_error:
+            results[i]["error"] = source_error or target_error
+        else:
+            groups.setdefault(source_id, []).append((i, target_id))
+
+    tasks = list(groups.items())
+    if workers > 1 and len(tasks) > 1 and fork_available():
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers) as pool:
+            answers = pool.imap_unordered(answer_source, tasks, chunksize=4)
+            for answer in answers:
+                fill_results(results, answer)
+    else:
+        for task in tasks:
+            fill_results(results, answer_source(task))
+    return results
+
+
+def fork_available():
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def answer_source(task):
+    """
+    Returns (index, path) for every target of one source, sharing a
+    single BFS tree between them.
+    """
+    source_id, targets = task
+    parents = degrees.shortest_path_tree(
+        source_id, [target_id for _, target_id in targets]
+    )
+    return [(i, degrees.path_in_tree(parents, target_id))
+            for i, target_id in targets]
+
+
+def fill_results(results, answer):
+    for i, path in answer:
+        if path is None:
+            results[i]["degrees"] = None
+            results[i]["path"] = None
+        else:
+            results[i]["degrees"] = len(path)
+            results[i]["path"] = [
+                {"movie_id": movie_id, "person_id": person_id}
+                for movie_id, person_id in path
+            ]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+Benchmarks for the degrees search on generated movie graphs.
+
+Usage: python benchmark.py [search|frontier|landmarks|cache|parallel] [seed]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+import degrees
+from graph import INDEX_TYPE, Graph, build_csr
+from parallel import ParallelBFS
+from util import Node, QueueFrontier
+
+SIZES = [1000, 10000, 100000]
+QUERIES = 20
+STARS_PER_MOVIE = 4
+LANDMARKS = 8
+
+FRONTIER_SIZES = [10000, 100000, 1000000]
+FRONTIER_OPS = 200
+
+CACHE_PEOPLE = 100000
+CACHE_CAPACITIES = [10000, 100000, 1000000]
+CACHE_QUERIES = 500
+CACHE_POPULAR = 50
+
+PARALLEL_PEOPLE = 2000000
+PARALLEL_WORKERS = [1, 2, 4, 8]
+PARALLEL_SOURCES = 5
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py "
+                 "[search|frontier|landmarks|cache|parallel] [seed]")
+    suite = sys.argv[1] if len(sys.argv) > 1 else "search"
+    seed = int(sys.argv[2]) if len(sys.argv) == 3 else 0
+    random.seed(seed)
+
+    if suite == "search":
+        benchmark_search()
+    elif suite == "frontier":
+        benchmark_frontier()
+    elif suite == "landmarks":
+        benchmark_landmarks()
+    elif suite == "cache":
+        benchmark_cache()
+    elif suite == "parallel":
+        benchmark_parallel()
+    else:
+        sys.exit(f"Unknown benchmark: {suite}")
+
+
+def generate_graph(num_people, stars_per_movie=STARS_PER_MOVIE):
+    """
+    Fills degrees.people and degrees.movies with a random graph of
+    num_people people, each starring in about two movies.
+    """
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    degrees.neighbor_cache.clear()
+
+    for i in range(num_people):
+        degrees.people[str(i)] = {
+            "name": f"Person {i}",
+            "birth": "",
+            "movies": set()
+        }
+        degrees.names[f"person {i}"] = {str(i)}
+
+    num_movies = 2 * num_people // stars_per_movie
+    for i in range(num_movies):
+        movie_id = f"m{i}"
+        degrees.movies[movie_id] = {
+            "title": f"Movie {i}",
+            "year": "",
+            "stars": set()
+        }
+        for _ in range(stars_per_movie):
+            person_id = str(random.randrange(num_people))
+            degrees.movies[movie_id]["stars"].add(person_id)
+            degrees.people[person_id]["movies"].add(movie_id)
+
+
+def count_expansions(search, *args, **kwargs):
+    """
+    Runs a search and returns its result, the number of people it
+    expanded and the wall time it took.
+    """
+    costars_for_person = degrees.costars_for_person
+    expanded = 0
+
+    def counting_costars(person_id):
+        nonlocal expanded
+        expanded += 1
+        return costars_for_person(person_id)
+
+    degrees.costars_for_person = counting_costars
+    try:
+        start = time.perf_counter()
+        result = search(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    finally:
+        degrees.costars_for_person = costars_for_person
+    return result, expanded, elapsed
+
+
+def benchmark_search():
+    """
+    Compares plain and bidirectional BFS on graphs of increasing size.
+    """
+    print(f"{'people':>8} {'mode':>14} {'expanded':>10} {'ms/query':>10}")
+    for size in SIZES:
+        generate_graph(size)
+        compare_modes(size, random_pairs(), [
+            ("bfs", {}),
+            ("bidirectional", {"bidirectional": True})
+        ])
+
+
+def benchmark_landmarks():
+    """
+    Compares plain BFS, bidirectional BFS and ALT search with a
+    landmark index on graphs of increasing size.
+    """
+    print(f"{'people':>8} {'mode':>14} {'expanded':>10} {'ms/query':>10}")
+    for size in SIZES:
+        generate_graph(size)
+        start = time.perf_counter()
+        index = degrees.build_landmark_index(LANDMARKS)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>8} {'index build':>14} {'':>10} "
+              f"{1000 * elapsed:>10.2f}")
+        compare_modes(size, random_pairs(), [
+            ("bfs", {}),
+            ("bidirectional", {"bidirectional": True}),
+            ("alt", {"landmarks": index})
+        ])
+
+
+def random_pairs():
+    person_ids = list(degrees.people)
+    return [
+        (random.choice(person_ids), random.choice(person_ids))
+        for _ in range(QUERIES)
+    ]
+
+
+def compare_modes(size, pairs, modes):
+    """
+    Runs shortest_path over pairs once per (name, keyword arguments)
+    mode, printing average expansions and latency, and exits if the
+    modes disagree on any path length.
+    """
+    totals = {}
+    for mode, kwargs in modes:
+        degrees.neighbor_cache.clear()
+        expanded_total = 0
+        elapsed_total = 0
+        lengths = []
+        for source, target in pairs:
+            path, expanded, elapsed = count_expansions(
+                degrees.shortest_path, source, target, **kwargs
+            )
+            expanded_total += expanded
+            elapsed_total += elapsed
+            lengths.append(None if path is None else len(path))
+        totals[mode] = lengths
+        print(f"{size:>8} {mode:>14} {expanded_total // len(pairs):>10} "
+              f"{1000 * elapsed_total / len(pairs):>10.2f}")
+
+    if any(lengths != totals[modes[0][0]] for lengths in totals.values()):
+        sys.exit("Path lengths differ between search modes.")
+
+
+class ListQueueFrontier():
+    """
+    The original list-backed queue frontier, kept for comparison.
+    """
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def time_frontier(frontier, explored, size):
+    """
+    Fills a frontier and an explored collection with size nodes, then
+    returns the seconds taken by FRONTIER_OPS each of removals,
+    contains_state checks and explored membership checks.
+    """
+    if isinstance(explored, set):
+        add_explored = explored.add
+    else:
+        add_explored = explored.append
+    for i in range(size):
+        frontier.add(Node(i, None, None))
+        add_explored(i)
+
+    misses = range(size, size + FRONTIER_OPS)
+    start = time.perf_counter()
+    for _ in range(FRONTIER_OPS):
+        frontier.remove()
+    for state in misses:
+        frontier.contains_state(state)
+    for state in misses:
+        state in explored
+    return time.perf_counter() - start
+
+
+def benchmark_frontier():
+    """
+    Compares the list-backed frontier and explored list against the
+    deque-backed frontier and explored set.
+    """
+    print(f"{'nodes':>8} {'list us/op':>12} {'deque us/op':>12} "
+          f"{'speedup':>9}")
+    ops = 3 * FRONTIER_OPS
+    for size in FRONTIER_SIZES:
+        old = time_frontier(ListQueueFrontier(), [], size)
+        new = time_frontier(QueueFrontier(), set(), size)
+        print(f"{size:>8} {1e6 * old / ops:>12.2f} {1e6 * new / ops:>12.3f} "
+              f"{old / new:>8.0f}x")
+
+
+def benchmark_cache():
+    """
+    Runs bidirectional queries from a small set of popular people with
+    several neighbor cache capacities, reporting hit rate and latency.
+    """
+    generate_graph(CACHE_PEOPLE)
+    person_ids = list(degrees.people)
+    popular = random.sample(person_ids, CACHE_POPULAR)
+    pairs = [
+        (random.choice(popular), random.choice(person_ids))
+        for _ in range(CACHE_QUERIES)
+    ]
+
+    print(f"{'capacity':>9} {'hit rate':>9} {'evictions':>10} "
+          f"{'ms/query':>10}")
+    capacity = degrees.neighbor_cache.capacity
+    try:
+        for size in CACHE_CAPACITIES:
+            cache = degrees.neighbor_cache
+            cache.clear()
+            cache.capacity = size
+            cache.hits = cache.misses = cache.evictions = 0
+            start = time.perf_counter()
+            for source, target in pairs:
+                degrees.shortest_path(source, target, bidirectional=True)
+            elapsed = time.perf_counter() - start
+            rate = cache.hits / max(1, cache.hits + cache.misses)
+            print(f"{size:>9} {rate:>9.1%} {cache.evictions:>10} "
+                  f"{1000 * elapsed / len(pairs):>10.2f}")
+    finally:
+        degrees.neighbor_cache.capacity = capacity
+        degrees.neighbor_cache.clear()
+
+
+def generate_compact_graph(num_people, stars_per_movie=STARS_PER_MOVIE):
+    """
+    Returns a random compact Graph shaped like generate_graph's.
+    """
+    num_movies = 2 * num_people // stars_per_movie
+    rng = np.random.default_rng(random.randrange(2 ** 32))
+    star_movies = np.repeat(
+        np.arange(num_movies, dtype=INDEX_TYPE), stars_per_movie
+    )
+    star_people = rng.integers(
+        num_people, size=len(star_movies), dtype=INDEX_TYPE
+    )
+    person_offsets, person_movies = build_csr(
+        star_people, star_movies, num_people
+    )
+    movie_offsets, movie_stars = build_csr(
+        star_movies, star_people, num_movies
+    )
+    person_ids = [str(i) for i in range(num_people)]
+    movie_ids = [f"m{i}" for i in range(num_movies)]
+    return Graph(person_ids, person_ids, [""] * num_people,
+                 movie_ids, movie_ids, [""] * num_movies,
+                 person_offsets, person_movies, movie_offsets, movie_stars)
+
+
+def benchmark_parallel():
+    """
+    Times full-graph BFS distance arrays with 1, 2, 4 and 8 worker
+    processes, checking each against the single-process result.
+    """
+    graph = generate_compact_graph(PARALLEL_PEOPLE)
+    sources = random.sample(graph.person_ids, PARALLEL_SOURCES)
+    expected = [graph.distances_from(source) for source in sources]
+
+    print(f"{'people':>8} {'workers':>8} {'ms/bfs':>10} {'speedup':>9}")
+    baseline = None
+    for workers in PARALLEL_WORKERS:
+        with ParallelBFS(graph, workers) as bfs:
+            start = time.perf_counter()
+            for source, distances in zip(sources, expected):
+                if not np.array_equal(bfs.distances_from(source), distances):
+                    sys.exit("Parallel BFS distances differ.")
+            elapsed = (time.perf_counter() - start) / len(sources)
+        baseline = baseline or elapsed
+        print(f"{PARALLEL_PEOPLE:>8} {workers:>8} {1000 * elapsed:>10.2f} "
+              f"{baseline / elapsed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
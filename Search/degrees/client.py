@@ -0,0 +1,117 @@
+"""
+Load-testing client for the degrees query server.
+
+Sends shortest path queries between random people over keep-alive
+connections, then prints client-side throughput and latency
+percentiles followed by the server's /stats.
+
+Usage: python client.py [--port N | --unix PATH] directory
+       [requests] [concurrency]
+"""
+
+import asyncio
+import csv
+import json
+import random
+import sys
+import time
+
+from server import DEFAULT_PORT, PERCENTILES
+
+DEFAULT_REQUESTS = 1000
+DEFAULT_CONCURRENCY = 16
+
+
+async def connect(port, unix):
+    if unix is not None:
+        return await asyncio.open_unix_connection(unix)
+    return await asyncio.open_connection("127.0.0.1", port)
+
+
+async def get(reader, writer, target):
+    """Sends one GET request and returns the status line and body."""
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: degrees\r\n\r\n".encode())
+    await writer.drain()
+    status = (await reader.readline()).decode().strip()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in [b"\r\n", b"\n", b""]:
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def worker(port, unix, queries, latencies, errors):
+    reader, writer = await connect(port, unix)
+    while queries:
+        target = queries.pop()
+        start = time.perf_counter()
+        status, _ = await get(reader, writer, target)
+        latencies.append(time.perf_counter() - start)
+        if not status.endswith("200 OK"):
+            errors.append(status)
+    writer.close()
+
+
+async def load_test(port, unix, queries, concurrency):
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        worker(port, unix, queries, latencies, errors)
+        for _ in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(latencies)} requests in {elapsed:.2f} s, "
+          f"{len(latencies) / elapsed:.1f} requests/s, "
+          f"{len(errors)} errors")
+    latencies.sort()
+    for p in PERCENTILES if latencies else []:
+        i = min(len(latencies) - 1, len(latencies) * p // 100)
+        print(f"p{p}: {1000 * latencies[i]:.2f} ms")
+
+    reader, writer = await connect(port, unix)
+    _, body = await get(reader, writer, "/stats")
+    writer.close()
+    print(json.dumps(json.loads(body), indent=4))
+
+
+def main():
+    args = sys.argv[1:]
+    port = DEFAULT_PORT
+    unix = None
+    try:
+        if "--port" in args:
+            i = args.index("--port")
+            port = int(args[i + 1])
+            del args[i:i + 2]
+        if "--unix" in args:
+            i = args.index("--unix")
+            unix = args[i + 1]
+            del args[i:i + 2]
+        requests = int(args[1]) if len(args) > 1 else DEFAULT_REQUESTS
+        concurrency = int(args[2]) if len(args) > 2 else DEFAULT_CONCURRENCY
+    except (IndexError, ValueError):
+        args = []
+    if len(args) not in [1, 2, 3] or requests < 1 or concurrency < 1:
+        sys.exit("Usage: python client.py [--port N | --unix PATH] "
+                 "directory [requests] [concurrency]")
+
+    # Pick people from the server's data directory
+    with open(f"{args[0]}/people.csv", encoding="utf-8") as f:
+        person_ids = [row["id"] for row in csv.DictReader(f)]
+    queries = [
+        f"/shortest_path?source={random.choice(person_ids)}"
+        f"&target={random.choice(person_ids)}"
+        for _ in range(requests)
+    ]
+
+    asyncio.run(load_test(port, unix, queries, concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
 import csv
+import heapq
+import itertools
+import os
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import MoviesView, NamesView, PeopleView
+from landmarks import UNREACHABLE, build_index, load_index, save_index
+from nameindex import DEFAULT_LIMIT, NameIndex
+from parallel import parallel_distances
+from snapshot import load_cached_graph, source_stats
+from util import LRUCache, Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +20,50 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, when loaded with compact=True
+graph = None
 
-def load_data(directory):
+# Prefix and typo-tolerant index over names, built on first use
+name_index = None
+
+# Landmark distance index file, optionally built inside a data directory
+LANDMARKS_FILE = "landmarks.npz"
+
+# Landmark distance index loaded from a data directory, and its file
+landmark_index = None
+landmark_path = None
+
+# Maps each CSV file path to the byte offset it has been read up to
+csv_offsets = {}
+
+# Most co-star entries kept in the neighbor cache
+NEIGHBOR_CACHE_SIZE = 1000000
+
+# Deduplicated co-stars of recently expanded people
+neighbor_cache = LRUCache(NEIGHBOR_CACHE_SIZE, weigh=len)
+
+
+def load_data(directory, compact=False):
     """
     Load data from CSV files into memory.
+
+    If compact is True, the data is kept in an integer-indexed graph
+    and people and movies become read-only views over it.
     """
+    global name_index, graph, names, people, movies
+    name_index = None
+    neighbor_cache.clear()
+
+    if compact:
+        load_compact_data(directory)
+        return
+
+    # Replace any compact graph and its read-only views
+    graph = None
+    names = {}
+    people = {}
+    movies = {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -30,6 +77,7 @@ def load_data(directory):
                 names[row["name"].lower()] = {row["id"]}
             else:
                 names[row["name"].lower()].add(row["id"])
+        csv_offsets[f.name] = f.tell()
 
     # Load movies
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
@@ -40,6 +88,7 @@ def load_data(directory):
                 "year": row["year"],
                 "stars": set()
             }
+        csv_offsets[f.name] = f.tell()
 
     # Load stars
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
@@ -50,16 +99,150 @@ def load_data(directory):
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
             except KeyError:
                 pass
+        csv_offsets[f.name] = f.tell()
+
+
+def load_compact_data(directory):
+    """
+    Load data into a compact graph, from a binary snapshot of the
+    CSV files when one is current.
+    """
+    global graph, names, people, movies
+    graph = load_cached_graph(directory)
+    names = NamesView(graph)
+    people = PeopleView(graph)
+    movies = MoviesView(graph)
+
+
+def load_landmarks(directory):
+    """
+    Loads the landmark index saved in a data directory, if there is one
+    built from its current CSV files. Returns whether an index was
+    loaded.
+    """
+    global landmark_index, landmark_path
+    path = os.path.join(directory, LANDMARKS_FILE)
+    if not os.path.exists(path):
+        return False
+    index = load_index(path, source_stats(directory))
+    if index is None:
+        return False
+    landmark_index = index
+    landmark_path = path
+    return True
+
+
+def ingest(directory):
+    """
+    Applies rows appended to people.csv, movies.csv and stars.csv since
+    they were loaded or last ingested, updating the name index and any
+    loaded landmark index in place. Rows for ids that are already
+    loaded are ignored.
+
+    Returns the number of people, movies and stars added.
+    """
+    if graph is not None:
+        raise Exception("compact graphs are read-only, reload instead")
+
+    new_people = []
+    for row in read_appended(f"{directory}/people.csv"):
+        if add_person(row["id"], row["name"], row["birth"]):
+            new_people.append(row["id"])
+
+    new_movies = 0
+    for row in read_appended(f"{directory}/movies.csv"):
+        if add_movie(row["id"], row["title"], row["year"]):
+            new_movies += 1
+
+    new_stars = 0
+    changed = set()
+    for row in read_appended(f"{directory}/stars.csv"):
+        if add_star(row["person_id"], row["movie_id"]):
+            new_stars += 1
+            changed.add(row["person_id"])
+            changed.update(movies[row["movie_id"]]["stars"])
+
+    # Save the index even if unchanged, to match the grown CSV files
+    if landmark_index is not None:
+        if new_people or changed:
+            landmark_index.add_people(new_people)
+            landmark_index.update(changed, lambda person_id: (
+                neighbor_id for _, neighbor_id in costars_for_person(person_id)
+            ))
+        save_index(landmark_index, landmark_path, source_stats(directory))
+
+    return len(new_people), new_movies, new_stars
+
+
+def read_appended(path):
+    """
+    Returns the rows of a CSV file after the offset it was last read up
+    to, as dictionaries, and moves the offset past them. A partly
+    written last line is left for the next call.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(max(csv_offsets.get(path, 0), len(header)))
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    csv_offsets[path] = max(csv_offsets.get(path, 0), len(header)) + end
+
+    fieldnames = next(csv.reader([header.decode("utf-8")]))
+    lines = data[:end].decode("utf-8").splitlines()
+    return list(csv.DictReader(lines, fieldnames=fieldnames))
+
+
+def add_person(person_id, name, birth):
+    """
+    Adds a person with no movies. Returns False if already loaded.
+    """
+    if person_id in people:
+        return False
+    people[person_id] = {"name": name, "birth": birth, "movies": set()}
+    names.setdefault(name.lower(), set()).add(person_id)
+    if name_index is not None:
+        name_index.add(name.lower())
+    return True
+
+
+def add_movie(movie_id, title, year):
+    """
+    Adds a movie with no stars. Returns False if already loaded.
+    """
+    if movie_id in movies:
+        return False
+    movies[movie_id] = {"title": title, "year": year, "stars": set()}
+    return True
+
+
+def add_star(person_id, movie_id):
+    """
+    Records that a person starred in a movie. Returns False if either
+    is unknown or the pair is already recorded.
+    """
+    if person_id not in people or movie_id not in movies:
+        return False
+    if movie_id in people[person_id]["movies"]:
+        return False
+    people[person_id]["movies"].add(movie_id)
+    movies[movie_id]["stars"].add(person_id)
+    for star_id in movies[movie_id]["stars"]:
+        neighbor_cache.discard(star_id)
+    return True
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [--compact] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +252,10 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if load_landmarks(directory):
+        path = shortest_path(source, target, landmarks=landmark_index)
+    else:
+        path = shortest_path(source, target, bidirectional=True)
 
     if path is None:
         print("Not connected.")
@@ -84,14 +270,26 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, landmarks=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If bidirectional is True, searches outward from both the source
+    and the target at once and stops where the two frontiers meet.
+    If a LandmarkIndex is given as landmarks, runs A* search guided by
+    the landmark distance bounds instead.
+
     If no possible path, returns None.
     """
-    explored = []
+    if landmarks is not None:
+        return alt_shortest_path(source, target, landmarks)
+    if bidirectional:
+        return bidirectional_shortest_path(source, target)
+    if graph is not None:
+        return graph.shortest_path(source, target)
+
+    explored = {source}
     node = Node(source, None, None)
     frontier = QueueFrontier()
     frontier.add(node)
@@ -106,47 +304,312 @@ def shortest_path(source, target):
             result.reverse()
             return result
         else:
-            for movie_id in people[rnode.state]['movies']:
-                for person_id in movies[movie_id]['stars']:
-                    if person_id not in explored:
-                        fnode = Node(person_id, rnode, movie_id)
-                        frontier.add(fnode)
-                        explored.append(person_id)
+            for movie_id, person_id in costars_for_person(rnode.state):
+                if person_id not in explored:
+                    fnode = Node(person_id, rnode, movie_id)
+                    frontier.add(fnode)
+                    explored.add(person_id)
+
+    return None
+
+
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, expanding one full BFS
+    level at a time from whichever side has the smaller frontier.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Each side maps a person_id to (movie_id, person_id) of the step
+    # that reached it, and to its distance from that side's root
+    forward_parents = {source: None}
+    backward_parents = {target: None}
+    forward_depth = {source: 0}
+    backward_depth = {target: 0}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = _expand_level(
+                forward_frontier, forward_parents, forward_depth,
+                backward_depth
+            )
+        else:
+            backward_frontier, meeting = _expand_level(
+                backward_frontier, backward_parents, backward_depth,
+                forward_depth
+            )
+        if meeting is not None:
+            return _join_paths(meeting, forward_parents, backward_parents)
+
+    return None
+
+
+def _expand_level(frontier, parents, depth, other_depth):
+    """
+    Expands every person in one BFS level, recording how each new
+    person was reached. Returns the next level and the best person
+    at which this side met the other side, if any.
+    """
+    next_frontier = []
+    meeting = None
+    best = None
+    for person_id in frontier:
+        for movie_id, neighbor_id in costars_for_person(person_id):
+            if neighbor_id in depth:
+                continue
+            parents[neighbor_id] = (movie_id, person_id)
+            depth[neighbor_id] = depth[person_id] + 1
+            next_frontier.append(neighbor_id)
+            if neighbor_id in other_depth:
+                length = depth[neighbor_id] + other_depth[neighbor_id]
+                if best is None or length < best:
+                    best = length
+                    meeting = neighbor_id
+    return next_frontier, meeting
+
+
+def _join_paths(meeting, forward_parents, backward_parents):
+    """
+    Joins the source-side and target-side search trees at the
+    meeting person into a list of (movie_id, person_id) pairs.
+    """
+    path = trace_path(forward_parents, meeting)
+
+    person_id = meeting
+    while backward_parents[person_id] is not None:
+        movie_id, next_id = backward_parents[person_id]
+        path.append((movie_id, next_id))
+        person_id = next_id
+    return path
+
+
+def alt_shortest_path(source, target, landmarks):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using A* search with
+    landmark lower bounds as the heuristic.
+
+    If no possible path, returns None.
+    """
+    lower, upper = landmarks.bounds(source, target)
+    if lower is None:
+        return None
+    h = landmarks.heuristic(target)
+
+    # Maps each reached person_id to the step that reached it
+    parents = {source: None}
+    cost = {source: 0}
+
+    # Ties on estimated length go to the deeper person, then to the
+    # earliest pushed
+    counter = itertools.count()
+    frontier = [(h(source), 0, next(counter), source)]
+    closed = set()
+
+    while frontier:
+        _, _, _, person_id = heapq.heappop(frontier)
+        if person_id == target:
+            return trace_path(parents, target)
+        if person_id in closed:
+            continue
+        closed.add(person_id)
+
+        for movie_id, neighbor_id in costars_for_person(person_id):
+            g = cost[person_id] + 1
+            if neighbor_id not in cost or g < cost[neighbor_id]:
+                cost[neighbor_id] = g
+                parents[neighbor_id] = (movie_id, person_id)
+                heapq.heappush(frontier, (
+                    g + h(neighbor_id), -g, next(counter), neighbor_id
+                ))
 
     return None
 
 
+def distances_from(source, workers=1):
+    """
+    Returns the separation between the source and every person, in
+    the order people iterates in, with UNREACHABLE for people it is
+    not connected to.
+
+    With a compact graph and more than one worker, each BFS level is
+    expanded by a pool of worker processes over shared memory.
+    """
+    if graph is not None:
+        if workers > 1:
+            return parallel_distances(graph, source, workers)
+        return graph.distances_from(source)
+
+    depth = {source: 0}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person_id in frontier:
+            for _, neighbor_id in costars_for_person(person_id):
+                if neighbor_id not in depth:
+                    depth[neighbor_id] = depth[person_id] + 1
+                    next_frontier.append(neighbor_id)
+        frontier = next_frontier
+    return [depth.get(person_id, UNREACHABLE) for person_id in people]
+
+
+def build_landmark_index(k):
+    """
+    Builds a LandmarkIndex of k landmarks over everyone in people,
+    starting from the person who starred in the most movies.
+    """
+    if graph is not None:
+        offsets = graph.person_offsets
+        first = graph.person_ids[int((offsets[1:] - offsets[:-1]).argmax())]
+    else:
+        first = max(people, key=lambda p: len(people[p]["movies"]),
+                    default=None)
+    return build_index(people, distances_from, k, first)
+
+
+def shortest_path_tree(source, targets=None):
+    """
+    Runs BFS out from the source and returns a dictionary mapping each
+    reached person_id to the (movie_id, person_id) step that reached it.
+
+    If targets is given, stops once every target has been reached.
+
+    In compact mode the tree is keyed by interned ids instead; either
+    way it can be passed to path_in_tree.
+    """
+    if graph is not None:
+        return graph.shortest_path_tree(source, targets)
+
+    parents = {source: None}
+    remaining = set(targets or ()) - {source}
+    frontier = [source]
+    while frontier and (remaining or targets is None):
+        next_frontier = []
+        for person_id in frontier:
+            for movie_id, neighbor_id in costars_for_person(person_id):
+                if neighbor_id not in parents:
+                    parents[neighbor_id] = (movie_id, person_id)
+                    next_frontier.append(neighbor_id)
+                    remaining.discard(neighbor_id)
+        frontier = next_frontier
+    return parents
+
+
+def path_in_tree(parents, target):
+    """
+    Returns the list of (movie_id, person_id) pairs that lead from the
+    root of a shortest path tree to the target, or None if unreached.
+    """
+    if graph is not None:
+        return graph.path_in_tree(parents, target)
+
+    if target not in parents:
+        return None
+    return trace_path(parents, target)
+
+
+def trace_path(parents, target):
+    """
+    Follows parent steps back from the target to the root of a search
+    tree and returns the (movie_id, person_id) pairs from the root.
+    """
+    path = []
+    person_id = target
+    while parents[person_id] is not None:
+        movie_id, parent_id = parents[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent_id
+    path.reverse()
+    return path
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If no name matches exactly, offers the closest names instead.
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
-        return None
+        person_ids = search_names(name)
+        if len(person_ids) == 0:
+            return None
+        print(f"No exact match for '{name}'. Did you mean:")
+        return choose_person(person_ids)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
+        return choose_person(person_ids)
     else:
         return person_ids[0]
 
 
+def choose_person(person_ids):
+    """
+    Lists people with their birth years and asks which one is meant.
+    """
+    for person_id in person_ids:
+        person = people[person_id]
+        name = person["name"]
+        birth = person["birth"]
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in person_ids:
+            return person_id
+    except ValueError:
+        pass
+    return None
+
+
+def search_names(query, limit=DEFAULT_LIMIT):
+    """
+    Returns up to limit person_ids whose names best match query:
+    exact matches, then names starting with it, then names with typos.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(names)
+
+    person_ids = []
+    for name in name_index.search(query, limit):
+        person_ids.extend(sorted(names[name]))
+    return person_ids[:limit]
+
+
+def costars_for_person(person_id):
+    """
+    Returns (movie_id, person_id) pairs for people who starred with a
+    given person, with one representative movie per co-star, from the
+    neighbor cache when possible.
+    """
+    costars = neighbor_cache.get(person_id)
+    if costars is None:
+        movie_for = {}
+        for movie_id, costar_id in neighbors_for_person(person_id):
+            if costar_id not in movie_for or movie_id < movie_for[costar_id]:
+                movie_for[costar_id] = movie_id
+        costars = tuple(
+            (movie_id, costar_id) for costar_id, movie_id in movie_for.items()
+        )
+        neighbor_cache.put(person_id, costars)
+    return costars
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
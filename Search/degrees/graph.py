@@ -0,0 +1,386 @@
+"""
+Compact integer-indexed graph of people and the movies they starred in.
+
+Person and movie ids are interned to dense integers, and the bipartite
+star relation is kept as two CSR adjacency arrays: one from people to
+their movies and one from movies to their stars.
+"""
+
+import csv
+import sys
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+
+import numpy as np
+
+INDEX_TYPE = np.int32
+
+
+class Graph():
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_index=None, movie_index=None, name_order=None):
+        # String tables, indexed by interned person or movie number
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+
+        # CSR adjacency: the movies of person p are
+        # person_movies[person_offsets[p]:person_offsets[p + 1]]
+        # Memory-mapped arrays are viewed as plain arrays, which are
+        # much cheaper to slice
+        self.person_offsets = np.asarray(person_offsets)
+        self.person_movies = np.asarray(person_movies)
+        self.movie_offsets = np.asarray(movie_offsets)
+        self.movie_stars = np.asarray(movie_stars)
+
+        # Maps person_ids and movie_ids back to their interned numbers
+        if person_index is None:
+            person_index = {
+                person_id: i for i, person_id in enumerate(person_ids)
+            }
+        if movie_index is None:
+            movie_index = {
+                movie_id: i for i, movie_id in enumerate(movie_ids)
+            }
+        self.person_index = person_index
+        self.movie_index = movie_index
+
+        # People sorted by lowercased name, computed on first use
+        self.name_order = name_order
+
+    def sorted_names(self):
+        """Returns interned people sorted by lowercased name."""
+        if self.name_order is None:
+            names = self.person_names
+            self.name_order = np.array(
+                sorted(range(len(names)), key=lambda i: names[i].lower()),
+                dtype=INDEX_TYPE
+            )
+        return self.name_order
+
+    def movies_of(self, person):
+        """Returns the interned movies a person starred in."""
+        start = self.person_offsets[person]
+        end = self.person_offsets[person + 1]
+        return self.person_movies[start:end].tolist()
+
+    def stars_of(self, movie):
+        """Returns the interned people who starred in a movie."""
+        start = self.movie_offsets[movie]
+        end = self.movie_offsets[movie + 1]
+        return self.movie_stars[start:end].tolist()
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) pairs of interned ids for people
+        who starred with a given interned person.
+        """
+        return [
+            (movie, star)
+            for movie in self.movies_of(person)
+            for star in self.stars_of(movie)
+        ]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        return {
+            (self.movie_ids[movie], self.person_ids[star])
+            for movie, star in self.neighbors(self.person_index[person_id])
+        }
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, searching over
+        interned ids.
+
+        If no possible path, returns None.
+        """
+        parents = self.shortest_path_tree(source, [target])
+        return self.path_in_tree(parents, target)
+
+    def shortest_path_tree(self, source, targets=None):
+        """
+        Runs BFS out from the source person_id, one whole level at a
+        time with array operations, and returns the tree it built as
+        (source, parent_movie, parent_person): for each interned person,
+        the interned movie and person that reached it, or -1.
+
+        If targets is given, stops once every target has been reached.
+        """
+        source = self.person_index[source]
+        remaining = {self.person_index[target] for target in targets or ()}
+        remaining.discard(source)
+
+        parent_movie = np.full(len(self.person_ids), -1, dtype=INDEX_TYPE)
+        parent_person = np.full(len(self.person_ids), -1, dtype=INDEX_TYPE)
+        parent_person[source] = source
+        movie_seen = np.zeros(len(self.movie_ids), dtype=bool)
+
+        frontier = np.array([source], dtype=INDEX_TYPE)
+        while len(frontier) and (remaining or targets is None):
+            frontier = self.expand_level(
+                frontier, parent_movie, parent_person, movie_seen
+            )
+            if remaining:
+                remaining.difference_update(frontier.tolist())
+        return source, parent_movie, parent_person
+
+    def distances_from(self, source):
+        """
+        Returns the separation between the source person_id and every
+        interned person, or -1 for people it is not connected to.
+        """
+        source = self.person_index[source]
+        distances = np.full(len(self.person_ids), -1, dtype=np.int16)
+        distances[source] = 0
+
+        parent_movie = np.full(len(self.person_ids), -1, dtype=INDEX_TYPE)
+        parent_person = np.full(len(self.person_ids), -1, dtype=INDEX_TYPE)
+        parent_person[source] = source
+        movie_seen = np.zeros(len(self.movie_ids), dtype=bool)
+
+        frontier = np.array([source], dtype=INDEX_TYPE)
+        depth = 0
+        while len(frontier):
+            frontier = self.expand_level(
+                frontier, parent_movie, parent_person, movie_seen
+            )
+            depth += 1
+            distances[frontier] = depth
+        return distances
+
+    def expand_level(self, frontier, parent_movie, parent_person,
+                     movie_seen):
+        """
+        Expands one BFS level of interned people, recording parents of
+        newly reached people, and returns the next level.
+        """
+        # Movies of the frontier not expanded yet, each reached once
+        movies, via_people = gather(
+            self.person_offsets, self.person_movies, frontier
+        )
+        movies, first = np.unique(movies, return_index=True)
+        via_people = via_people[first]
+        new = ~movie_seen[movies]
+        movies = movies[new]
+        via_people = via_people[new]
+        movie_seen[movies] = True
+
+        # Stars of those movies not reached yet, each reached once
+        stars, via_movies = gather(
+            self.movie_offsets, self.movie_stars, movies
+        )
+        stars, first = np.unique(stars, return_index=True)
+        via_movies = via_movies[first]
+        new = parent_person[stars] == -1
+        stars = stars[new]
+        via_movies = via_movies[new]
+
+        index = np.searchsorted(movies, via_movies)
+        parent_movie[stars] = via_movies
+        parent_person[stars] = via_people[index]
+        return stars
+
+    def path_in_tree(self, tree, target):
+        """
+        Returns the list of (movie_id, person_id) pairs that lead from
+        the root of a shortest path tree to the target person_id,
+        or None if unreached.
+        """
+        source, parent_movie, parent_person = tree
+        person = self.person_index[target]
+        if parent_person[person] == -1:
+            return None
+        path = []
+        while person != source:
+            movie = int(parent_movie[person])
+            path.append((self.movie_ids[movie], self.person_ids[person]))
+            person = int(parent_person[person])
+        path.reverse()
+        return path
+
+
+class NamesView(Mapping):
+    """
+    Read-only mapping from lowercased names to sets of person_ids,
+    shaped like degrees.names, searched by bisection over people
+    sorted by name.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.order = graph.sorted_names()
+
+    def key(self, person):
+        return self.graph.person_names[person].lower()
+
+    def __getitem__(self, name):
+        start = bisect_left(self.order, name, key=self.key)
+        end = bisect_right(self.order, name, lo=start, key=self.key)
+        if start == end:
+            raise KeyError(name)
+        return {
+            self.graph.person_ids[person]
+            for person in self.order[start:end].tolist()
+        }
+
+    def __iter__(self):
+        last = None
+        for person in self.order.tolist():
+            name = self.key(person)
+            if name != last:
+                yield name
+                last = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class PeopleView(Mapping):
+    """
+    Read-only people mapping over a Graph, shaped like degrees.people.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {
+                graph.movie_ids[movie] for movie in graph.movies_of(person)
+            }
+        }
+
+    def __contains__(self, person_id):
+        return person_id in self.graph.person_index
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only movies mapping over a Graph, shaped like degrees.movies.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {
+                graph.person_ids[star] for star in graph.stars_of(movie)
+            }
+        }
+
+    def __contains__(self, movie_id):
+        return movie_id in self.graph.movie_index
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+def gather(offsets, values, rows):
+    """
+    Returns the CSR values of every row in rows, concatenated, along
+    with the row each value came from.
+    """
+    starts = offsets[rows]
+    counts = offsets[rows + 1] - starts
+    total = int(counts.sum())
+    ends = np.cumsum(counts)
+    positions = (np.arange(total)
+                 - np.repeat(ends - counts, counts)
+                 + np.repeat(starts, counts))
+    return values[positions], np.repeat(rows, counts)
+
+
+def build_csr(rows, columns, num_rows):
+    """
+    Returns (offsets, values) of a CSR array holding, for each row,
+    the sorted distinct columns paired with it.
+    """
+    order = np.lexsort((columns, rows))
+    rows = rows[order]
+    columns = columns[order]
+
+    # Drop repeated (row, column) pairs, as the set-based loader does
+    keep = np.ones(len(rows), dtype=bool)
+    keep[1:] = (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1])
+    rows = rows[keep]
+    columns = columns[keep]
+
+    offsets = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=offsets[1:])
+    return offsets, columns.astype(INDEX_TYPE)
+
+
+def load_graph(directory):
+    """
+    Load data from CSV files into a compact Graph.
+    """
+    person_ids, person_names, person_births = [], [], []
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            person_ids.append(row["id"])
+            person_names.append(row["name"])
+            person_births.append(sys.intern(row["birth"]))
+    person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+
+    movie_ids, movie_titles, movie_years = [], [], []
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movie_ids.append(row["id"])
+            movie_titles.append(row["title"])
+            movie_years.append(sys.intern(row["year"]))
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+    star_people, star_movies = [], []
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                person = person_index[row["person_id"]]
+                movie = movie_index[row["movie_id"]]
+            except KeyError:
+                continue
+            star_people.append(person)
+            star_movies.append(movie)
+
+    star_people = np.array(star_people, dtype=INDEX_TYPE)
+    star_movies = np.array(star_movies, dtype=INDEX_TYPE)
+    person_offsets, person_movies = build_csr(
+        star_people, star_movies, len(person_ids)
+    )
+    movie_offsets, movie_stars = build_csr(
+        star_movies, star_people, len(movie_ids)
+    )
+
+    return Graph(person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars)
@@ -0,0 +1,213 @@
+"""
+Landmark distance index for degrees.
+
+Stores BFS distances from k landmark people to everyone else. By the
+triangle inequality these give lower and upper bounds on the separation
+of any two people, and the lower bound is an admissible A* heuristic
+(ALT search).
+
+A saved index records the size and modification time of the CSV files
+it was built from, like a snapshot, and is ignored once they change.
+
+Usage: python landmarks.py [--compact] directory [k]
+"""
+
+import heapq
+import json
+import sys
+
+import numpy as np
+
+from snapshot import source_stats
+
+UNREACHABLE = -1
+DISTANCE_TYPE = np.int16
+DEFAULT_LANDMARKS = 16
+
+
+class LandmarkIndex():
+    def __init__(self, landmarks, person_ids, distances):
+        # Person_ids of the landmarks, one per column of distances
+        self.landmarks = landmarks
+
+        # Person_ids, one per row of distances
+        self.person_ids = person_ids
+        self.rows = {person_id: i for i, person_id in enumerate(person_ids)}
+
+        # distances[row, column] is the separation between a person and
+        # a landmark, or UNREACHABLE
+        self.distances = distances
+
+    def distances_for(self, person_id):
+        """Returns the distances from every landmark to a person."""
+        return self.distances[self.rows[person_id]]
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the separation of two people.
+        Upper is None if no landmark reaches both. Both are None if a
+        landmark reaches only one of them, as they are not connected.
+        """
+        source = self.distances_for(source).astype(np.int32)
+        target = self.distances_for(target).astype(np.int32)
+        source_reached = source != UNREACHABLE
+        target_reached = target != UNREACHABLE
+        if np.any(source_reached != target_reached):
+            return None, None
+
+        both = source_reached & target_reached
+        if not np.any(both):
+            return 0, None
+        lower = int(np.max(np.abs(source[both] - target[both])))
+        upper = int(np.min(source[both] + target[both]))
+        return lower, upper
+
+    def heuristic(self, target):
+        """
+        Returns a function giving a lower bound on the separation
+        between any person and the target.
+        """
+        distances = self.distances_for(target).tolist()
+        target = [
+            (column, distance)
+            for column, distance in enumerate(distances)
+            if distance != UNREACHABLE
+        ]
+
+        def h(person_id):
+            distances = self.distances_for(person_id).tolist()
+            return max(
+                (abs(distances[column] - distance)
+                 for column, distance in target),
+                default=0
+            )
+        return h
+
+    def add_people(self, person_ids):
+        """Adds rows for new people, unreached by every landmark."""
+        for person_id in person_ids:
+            self.rows[person_id] = len(self.person_ids)
+            self.person_ids.append(person_id)
+        rows = np.full((len(person_ids), len(self.landmarks)), UNREACHABLE,
+                       dtype=DISTANCE_TYPE)
+        self.distances = np.concatenate([self.distances, rows])
+
+    def update(self, changed, neighbors):
+        """
+        Lowers distances after connections were added between people.
+        changed holds every person who gained a neighbor, and
+        neighbors(p) returns the person_ids p is connected to.
+        """
+        for column in range(len(self.landmarks)):
+            distances = self.distances[:, column]
+
+            # Relax outward from the changed people, nearest first
+            frontier = [
+                (int(distances[self.rows[person_id]]), person_id)
+                for person_id in changed
+                if distances[self.rows[person_id]] != UNREACHABLE
+            ]
+            heapq.heapify(frontier)
+            while frontier:
+                distance, person_id = heapq.heappop(frontier)
+                if distance != distances[self.rows[person_id]]:
+                    continue
+                for neighbor_id in neighbors(person_id):
+                    row = self.rows[neighbor_id]
+                    if (distances[row] == UNREACHABLE
+                            or distances[row] > distance + 1):
+                        distances[row] = distance + 1
+                        heapq.heappush(frontier, (distance + 1, neighbor_id))
+
+
+def build_index(person_ids, distances_from, k=DEFAULT_LANDMARKS,
+                first=None):
+    """
+    Builds a LandmarkIndex over person_ids, where distances_from(p)
+    returns the distances from p to every person, aligned with
+    person_ids, with UNREACHABLE for people in other components.
+
+    Landmarks are picked by farthest-point selection, starting from
+    first (by default, the first person).
+    """
+    person_ids = list(person_ids)
+    if not person_ids:
+        return LandmarkIndex([], [], np.zeros((0, 0), dtype=DISTANCE_TYPE))
+    if first is None:
+        first = person_ids[0]
+    rows = {person_id: i for i, person_id in enumerate(person_ids)}
+
+    landmarks = []
+    columns = []
+    landmark = first
+    nearest = None
+    for _ in range(min(k, len(person_ids))):
+        distances = np.asarray(distances_from(landmark), dtype=DISTANCE_TYPE)
+        landmarks.append(landmark)
+        columns.append(distances)
+
+        # Next landmark is the reachable person farthest from all so far
+        reached = np.where(distances == UNREACHABLE,
+                           np.iinfo(DISTANCE_TYPE).max, distances)
+        nearest = reached if nearest is None else np.minimum(nearest, reached)
+        candidates = np.where(columns[0] == UNREACHABLE, -1, nearest)
+        candidates[[rows[p] for p in landmarks]] = -1
+        best = int(np.argmax(candidates))
+        if candidates[best] <= 0:
+            break
+        landmark = person_ids[best]
+
+    return LandmarkIndex(landmarks, person_ids, np.stack(columns, axis=1))
+
+
+def save_index(index, path, sources):
+    """
+    Writes a LandmarkIndex to a .npz file, tagged with the stats of the
+    source files it was built from.
+    """
+    np.savez(path,
+             landmarks=np.array(index.landmarks),
+             person_ids=np.array(index.person_ids),
+             distances=index.distances,
+             sources=np.array(json.dumps(sources)))
+
+
+def load_index(path, sources):
+    """
+    Reads a LandmarkIndex written by save_index, or returns None if it
+    cannot be read or was built from different source files.
+    """
+    try:
+        with np.load(path) as data:
+            if json.loads(str(data["sources"])) != sources:
+                return None
+            return LandmarkIndex(data["landmarks"].tolist(),
+                                 data["person_ids"].tolist(),
+                                 data["distances"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def main():
+    import degrees
+
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    if len(args) not in [1, 2]:
+        sys.exit("Usage: python landmarks.py [--compact] directory [k]")
+    directory = args[0]
+    k = int(args[1]) if len(args) == 2 else DEFAULT_LANDMARKS
+
+    print("Loading data...")
+    degrees.load_data(directory, compact)
+    print("Building landmark index...")
+    index = degrees.build_landmark_index(k)
+    save_index(index, f"{directory}/{degrees.LANDMARKS_FILE}",
+               source_stats(directory))
+    print(f"Saved {len(index.landmarks)} landmarks.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Prefix and typo-tolerant index over lowercased person names.
+
+Prefix lookups bisect a sorted list of distinct names. Fuzzy lookups
+match each word of the query against the words of all names, allowing
+up to MAX_EDITS edits per word, using a table of single-character
+deletions (as in SymSpell), then rank the names that contain a match
+for every query word by their edit distance to the whole query.
+"""
+
+import heapq
+from bisect import bisect_left
+
+MAX_EDITS = 1
+DEFAULT_LIMIT = 10
+
+# Most fuzzy candidates ranked by full edit distance, closest in length
+MAX_RANKED = 500
+
+
+class NameIndex():
+    def __init__(self, names):
+        # Distinct lowercased names in sorted order
+        self.names = sorted(set(names))
+
+        # Maps each word to the names containing it
+        self.words = {}
+
+        # Maps each word, and each word with one character deleted,
+        # to the words it came from
+        self.deletes = {}
+
+        for name in self.names:
+            self.index_words(name)
+
+    def index_words(self, name):
+        for word in set(name.split()):
+            if word not in self.words:
+                self.words[word] = []
+                for variant in deletions(word):
+                    self.deletes.setdefault(variant, []).append(word)
+            self.words[word].append(name)
+
+    def add(self, name):
+        """
+        Adds a lowercased name to the index, if not indexed already.
+        """
+        i = bisect_left(self.names, name)
+        if i < len(self.names) and self.names[i] == name:
+            return
+        self.names.insert(i, name)
+        self.index_words(name)
+
+    def prefix(self, query, limit=DEFAULT_LIMIT):
+        """
+        Returns up to limit names starting with query, in sorted order.
+        """
+        query = query.lower()
+        matches = []
+        i = bisect_left(self.names, query)
+        while (i < len(self.names) and len(matches) < limit
+               and self.names[i].startswith(query)):
+            matches.append(self.names[i])
+            i += 1
+        return matches
+
+    def fuzzy(self, query, limit=DEFAULT_LIMIT):
+        """
+        Returns up to limit names in which every word of query appears
+        with at most MAX_EDITS typos, closest to query first.
+        """
+        query = query.lower()
+
+        # Start from the query word with the fewest matching names, then
+        # filter those names by the other words
+        matches = []
+        for word in query.split():
+            similar = self.similar_words(word)
+            size = sum(len(self.words[match]) for match in similar)
+            matches.append((size, similar))
+        if not matches:
+            return []
+        matches.sort(key=lambda match: match[0])
+
+        candidates = set()
+        for word in matches[0][1]:
+            candidates.update(self.words[word])
+        for _, similar in matches[1:]:
+            candidates = {
+                name for name in candidates
+                if not similar.isdisjoint(name.split())
+            }
+
+        if len(candidates) > MAX_RANKED:
+            candidates = heapq.nsmallest(
+                MAX_RANKED, candidates,
+                key=lambda name: abs(len(name) - len(query))
+            )
+        ranked = sorted(
+            (edit_distance(query, name), name) for name in candidates
+        )
+        return [name for _, name in ranked[:limit]]
+
+    def similar_words(self, word):
+        """
+        Returns the indexed words within MAX_EDITS edits of word.
+        """
+        similar = set()
+        for variant in deletions(word):
+            for candidate in self.deletes.get(variant, ()):
+                if candidate not in similar and (
+                    edit_distance(word, candidate) <= MAX_EDITS
+                ):
+                    similar.add(candidate)
+        return similar
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        Returns up to limit names ranked for query: an exact match,
+        then names starting with query, then names matching it with
+        typos.
+        """
+        results = []
+        for name in self.prefix(query, limit) + self.fuzzy(query, limit):
+            if name not in results:
+                results.append(name)
+        return results[:limit]
+
+
+def deletions(word):
+    """
+    Returns word and every string made by deleting one of its characters.
+    """
+    variants = {word}
+    for i in range(len(word)):
+        variants.add(word[:i] + word[i + 1:])
+    return variants
+
+
+def edit_distance(a, b):
+    """
+    Returns the optimal string alignment distance between a and b: the
+    number of insertions, deletions, substitutions and transpositions
+    of adjacent characters needed to turn one into the other.
+    """
+    two_back = None
+    one_back = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            distance = min(one_back[j] + 1,
+                           row[j - 1] + 1,
+                           one_back[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                distance = min(distance, two_back[j - 2] + 1)
+            row.append(distance)
+        two_back, one_back = one_back, row
+    return one_back[-1]
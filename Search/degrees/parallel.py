@@ -0,0 +1,166 @@
+"""
+Multi-process level-synchronous BFS over a compact degrees Graph.
+
+The CSR adjacency arrays, the distance array and the set of expanded
+movies live in shared memory. Each BFS level is split into chunks that
+worker processes expand at once; workers write distances for the people
+they reach straight into the shared array. Two workers may reach the
+same person or expand the same movie within a level, but they only ever
+write the same values, so the race costs some duplicate work and
+nothing else.
+"""
+
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from graph import gather
+from landmarks import DISTANCE_TYPE, UNREACHABLE
+
+# Levels smaller than this are expanded in the calling process
+MIN_PARALLEL_LEVEL = 2048
+CHUNKS_PER_WORKER = 4
+
+ADJACENCY = ["person_offsets", "person_movies",
+             "movie_offsets", "movie_stars"]
+
+# Arrays attached by each worker process
+shared = {}
+
+
+class ParallelBFS():
+    """
+    Pool of worker processes sharing one Graph's adjacency, for running
+    many full BFS passes. Use as a context manager, or call close().
+    """
+
+    def __init__(self, graph, workers):
+        self.graph = graph
+        self.workers = workers
+        self.blocks = []
+        self.arrays = {}
+
+        specs = {}
+        for name in ADJACENCY:
+            specs[name] = self.share(name, getattr(graph, name))
+        specs["distances"] = self.share("distances", np.full(
+            len(graph.person_ids), UNREACHABLE, dtype=DISTANCE_TYPE
+        ))
+        specs["movie_seen"] = self.share("movie_seen", np.zeros(
+            len(graph.movie_ids), dtype=bool
+        ))
+
+        self.pool = None
+        if workers > 1:
+            self.pool = multiprocessing.Pool(
+                workers, initializer=init_worker, initargs=(specs,)
+            )
+
+    def share(self, name, array):
+        """
+        Copies array into a new shared memory block, kept as
+        self.arrays[name], and returns the (block name, shape, dtype)
+        workers need to attach to it.
+        """
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True,
+                                           size=max(array.nbytes, 1))
+        self.blocks.append(block)
+        self.arrays[name] = np.ndarray(array.shape, array.dtype,
+                                       buffer=block.buf)
+        self.arrays[name][:] = array
+        return block.name, array.shape, array.dtype.str
+
+    def distances_from(self, source):
+        """
+        Returns the separation between the source person_id and every
+        interned person, or UNREACHABLE for people not connected to it.
+        """
+        source = self.graph.person_index[source]
+        distances = self.arrays["distances"]
+        movie_seen = self.arrays["movie_seen"]
+        distances[:] = UNREACHABLE
+        movie_seen[:] = False
+        distances[source] = 0
+
+        frontier = np.array([source], dtype=np.int32)
+        depth = 0
+        while len(frontier):
+            depth += 1
+            if self.pool is None or len(frontier) < MIN_PARALLEL_LEVEL:
+                frontier = expand(self.arrays, frontier, depth)
+                continue
+            chunks = np.array_split(
+                frontier, self.workers * CHUNKS_PER_WORKER
+            )
+            reached = self.pool.map(
+                expand_chunk, [(chunk, depth) for chunk in chunks]
+            )
+            frontier = np.unique(np.concatenate(reached))
+        return distances.copy()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        self.arrays = {}
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def parallel_distances(graph, source, workers):
+    """
+    Returns the separation between the source person_id and every
+    interned person of graph, computed with workers processes.
+    """
+    with ParallelBFS(graph, workers) as bfs:
+        return bfs.distances_from(source)
+
+
+def init_worker(specs):
+    """
+    Attaches a worker process to the shared arrays described by specs.
+    """
+    shared["blocks"] = []
+    shared["arrays"] = {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        shared["blocks"].append(block)
+        shared["arrays"][name] = np.ndarray(shape, np.dtype(dtype),
+                                            buffer=block.buf)
+
+
+def expand_chunk(task):
+    chunk, depth = task
+    return expand(shared["arrays"], chunk, depth)
+
+
+def expand(arrays, frontier, depth):
+    """
+    Expands part of one BFS level, marking newly reached people with
+    depth, and returns them.
+    """
+    movie_seen = arrays["movie_seen"]
+    distances = arrays["distances"]
+
+    movies, _ = gather(arrays["person_offsets"], arrays["person_movies"],
+                       frontier)
+    movies = np.unique(movies)
+    movies = movies[~movie_seen[movies]]
+    movie_seen[movies] = True
+
+    stars, _ = gather(arrays["movie_offsets"], arrays["movie_stars"], movies)
+    stars = np.unique(stars)
+    stars = stars[distances[stars] == UNREACHABLE]
+    distances[stars] = depth
+    return stars
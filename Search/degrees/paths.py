@@ -0,0 +1,172 @@
+"""
+Queries over every shortest path, or the k shortest paths, between two
+people in the loaded degrees data.
+
+Paths have the same format as degrees.shortest_path: lists of
+(movie_id, person_id) pairs leading from the source to the target.
+Two paths through the same people but different movies are distinct.
+"""
+
+import heapq
+import itertools
+
+import degrees
+
+
+def shortest_path_dag(source, target):
+    """
+    Returns the shortest path DAG from source to target: a dictionary
+    mapping each person on some shortest path to the (movie_id,
+    person_id) steps reaching them from the previous BFS layer, in BFS
+    order. Returns None if the two people are not connected.
+    """
+    depth = {source: 0}
+    steps = {source: []}
+    frontier = [source]
+    while frontier and target not in depth:
+        next_frontier = []
+        for person_id in frontier:
+            neighbors = degrees.neighbors_for_person(person_id)
+            for movie_id, neighbor_id in neighbors:
+                if neighbor_id not in depth:
+                    depth[neighbor_id] = depth[person_id] + 1
+                    steps[neighbor_id] = []
+                    next_frontier.append(neighbor_id)
+                if depth[neighbor_id] == depth[person_id] + 1:
+                    steps[neighbor_id].append((movie_id, person_id))
+        frontier = next_frontier
+
+    if target not in depth:
+        return None
+
+    # Keep only the people the target can be traced back to
+    relevant = set()
+    stack = [target]
+    while stack:
+        person_id = stack.pop()
+        if person_id not in relevant:
+            relevant.add(person_id)
+            stack.extend(parent_id for _, parent_id in steps[person_id])
+    return {
+        person_id: person_steps
+        for person_id, person_steps in steps.items()
+        if person_id in relevant
+    }
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns the number of distinct shortest paths from source to target,
+    counted over the shortest path DAG without listing them.
+    """
+    dag = shortest_path_dag(source, target)
+    if dag is None:
+        return 0
+    counts = {}
+    for person_id, steps in dag.items():
+        if person_id == source:
+            counts[person_id] = 1
+        else:
+            counts[person_id] = sum(counts[parent_id]
+                                    for _, parent_id in steps)
+    return counts[target]
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest path from source to target, one at a time.
+
+    Paths are traced back from the target through the shortest path
+    DAG depth first, so only one partial path per DAG branch is held
+    in memory at once.
+    """
+    dag = shortest_path_dag(source, target)
+    if dag is None:
+        return
+
+    # Each partial path is a linked list of steps from a person onward
+    # to the target: ((movie_id, person_id), rest)
+    stack = [(target, None)]
+    while stack:
+        person_id, suffix = stack.pop()
+        if person_id == source:
+            path = []
+            while suffix is not None:
+                step, suffix = suffix
+                path.append(step)
+            yield path
+            continue
+        for movie_id, parent_id in dag[person_id]:
+            stack.append((parent_id, ((movie_id, person_id), suffix)))
+
+
+def k_shortest_paths(source, target, k):
+    """
+    Yields up to k shortest paths from source to target that visit no
+    person twice, shortest first, using Yen's algorithm.
+    """
+    path = constrained_shortest_path(source, target, set(), set())
+    if path is None or k < 1:
+        return
+    found = [path]
+    yield path
+
+    seen = {tuple(path)}
+    candidates = []
+    counter = itertools.count()
+    while len(found) < k:
+        last = found[-1]
+        people = [source] + [person_id for _, person_id in last]
+        for i in range(len(last)):
+            spur = people[i]
+            root = last[:i]
+
+            # Forbid the steps earlier paths took from the same root, and
+            # revisiting people on the root
+            removed = {
+                (spur, found_path[i]) for found_path in found
+                if len(found_path) > i and found_path[:i] == root
+            }
+            blocked = set(people[:i])
+
+            spur_path = constrained_shortest_path(
+                spur, target, blocked, removed
+            )
+            if spur_path is not None:
+                candidate = root + spur_path
+                if tuple(candidate) not in seen:
+                    seen.add(tuple(candidate))
+                    heapq.heappush(
+                        candidates, (len(candidate), next(counter), candidate)
+                    )
+
+        if not candidates:
+            return
+        _, _, path = heapq.heappop(candidates)
+        found.append(path)
+        yield path
+
+
+def constrained_shortest_path(source, target, blocked, removed):
+    """
+    Returns the shortest path from source to target that avoids the
+    blocked people and the removed (person_id, (movie_id, person_id))
+    steps, or None if there is none.
+    """
+    parents = {source: None}
+    frontier = [source]
+    while frontier and target not in parents:
+        next_frontier = []
+        for person_id in frontier:
+            for step in degrees.neighbors_for_person(person_id):
+                neighbor_id = step[1]
+                if (neighbor_id in parents or neighbor_id in blocked
+                        or (person_id, step) in removed):
+                    continue
+                parents[neighbor_id] = (step[0], person_id)
+                next_frontier.append(neighbor_id)
+        frontier = next_frontier
+
+    if target not in parents:
+        return None
+    return degrees.trace_path(parents, target)
@@ -0,0 +1,231 @@
+"""
+Long-running degrees query server.
+
+Loads the data once and answers HTTP GET requests, over TCP or a Unix
+socket, with JSON:
+
+    /shortest_path?source=ID&target=ID[&mode=bfs|bidirectional|alt]
+    /neighbors?person=ID
+    /search?name=NAME
+    /stats
+
+Recent answers are kept in an LRU cache, and /stats reports latency
+percentiles for each endpoint along with hits and misses of the answer
+cache and of degrees' neighbor cache.
+
+Usage: python server.py [--compact] [--port N | --unix PATH] directory
+"""
+
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import degrees
+from util import LRUCache
+
+DEFAULT_PORT = 8050
+CACHE_SIZE = 10000
+
+# Latencies kept per endpoint for percentiles
+LATENCY_WINDOW = 10000
+PERCENTILES = [50, 90, 99]
+
+
+class QueryServer():
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache = LRUCache(cache_size)
+        self.latencies = {}
+        self.endpoints = {
+            "/shortest_path": self.shortest_path,
+            "/neighbors": self.neighbors,
+            "/search": self.search
+        }
+
+    async def handle(self, reader, writer):
+        """Answers HTTP requests on one connection until it closes."""
+        try:
+            while True:
+                request = await reader.readline()
+                if not request:
+                    break
+                while (await reader.readline()) not in [b"\r\n", b"\n", b""]:
+                    pass
+                status, body, keep_alive = await self.respond(request)
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}"
+                    f"\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, request):
+        """
+        Returns (status, body, keep_alive) for one HTTP request line.
+        """
+        try:
+            method, target, version = request.decode().split()
+        except ValueError:
+            return "400 Bad Request", b'{"error": "bad request"}', False
+        keep_alive = version == "HTTP/1.1"
+
+        url = urlsplit(target)
+        path = unquote(url.path)
+        params = {
+            key: values[0] for key, values in parse_qs(url.query).items()
+        }
+        if method != "GET":
+            return "405 Method Not Allowed", b'{"error": "use GET"}', False
+        if path == "/stats":
+            return "200 OK", json.dumps(self.stats()).encode(), keep_alive
+        if path not in self.endpoints:
+            return "404 Not Found", b'{"error": "not found"}', keep_alive
+
+        start = time.perf_counter()
+        key = (path, tuple(sorted(params.items())))
+        body = self.cache.get(key)
+        if body is None:
+            loop = asyncio.get_running_loop()
+            try:
+                result = await loop.run_in_executor(
+                    None, self.endpoints[path], params
+                )
+            except KeyError as e:
+                self.record(path, time.perf_counter() - start)
+                error = json.dumps({"error": f"missing or unknown {e}"})
+                return "400 Bad Request", error.encode(), keep_alive
+            except Exception as e:
+                self.record(path, time.perf_counter() - start)
+                error = json.dumps({"error": str(e) or type(e).__name__})
+                return "500 Internal Server Error", error.encode(), keep_alive
+            body = json.dumps(result).encode()
+            self.cache.put(key, body)
+        self.record(path, time.perf_counter() - start)
+        return "200 OK", body, keep_alive
+
+    def record(self, path, elapsed):
+        if path not in self.latencies:
+            self.latencies[path] = deque(maxlen=LATENCY_WINDOW)
+        self.latencies[path].append(elapsed)
+
+    def stats(self):
+        """
+        Returns request counts and latency percentiles, in milliseconds,
+        per endpoint, with answer and neighbor cache statistics.
+        """
+        endpoints = {}
+        for path, latencies in self.latencies.items():
+            ordered = sorted(latencies)
+            endpoints[path] = {"requests": len(ordered)}
+            for p in PERCENTILES:
+                i = min(len(ordered) - 1, len(ordered) * p // 100)
+                endpoints[path][f"p{p}_ms"] = round(1000 * ordered[i], 3)
+        return {
+            "endpoints": endpoints,
+            "cache": self.cache.stats(),
+            "neighbor_cache": degrees.neighbor_cache.stats()
+        }
+
+    def shortest_path(self, params):
+        source = params["source"]
+        target = params["target"]
+        for person_id in [source, target]:
+            if person_id not in degrees.people:
+                raise KeyError(person_id)
+
+        mode = params.get("mode", "bidirectional")
+        if mode == "alt" and degrees.landmark_index is not None:
+            path = degrees.shortest_path(
+                source, target, landmarks=degrees.landmark_index
+            )
+        else:
+            path = degrees.shortest_path(
+                source, target, bidirectional=(mode != "bfs")
+            )
+        if path is None:
+            return {"degrees": None, "path": None}
+        return {
+            "degrees": len(path),
+            "path": [{"movie_id": movie_id, "person_id": person_id}
+                     for movie_id, person_id in path]
+        }
+
+    def neighbors(self, params):
+        person_id = params["person"]
+        if person_id not in degrees.people:
+            raise KeyError(person_id)
+        return [
+            {"movie_id": movie_id, "person_id": neighbor_id}
+            for movie_id, neighbor_id in
+            sorted(degrees.neighbors_for_person(person_id))
+        ]
+
+    def search(self, params):
+        results = []
+        for person_id in degrees.search_names(params["name"]):
+            person = degrees.people[person_id]
+            results.append({"person_id": person_id, "name": person["name"],
+                            "birth": person["birth"]})
+        return results
+
+
+async def serve(port=None, unix=None):
+    server = QueryServer()
+    if unix is not None:
+        listener = await asyncio.start_unix_server(server.handle, unix)
+        print(f"Listening on {unix}")
+    else:
+        listener = await asyncio.start_server(
+            server.handle, "127.0.0.1", port
+        )
+        print(f"Listening on http://127.0.0.1:{port}")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    port = DEFAULT_PORT
+    unix = None
+    try:
+        if "--port" in args:
+            i = args.index("--port")
+            port = int(args[i + 1])
+            del args[i:i + 2]
+        if "--unix" in args:
+            i = args.index("--unix")
+            unix = args[i + 1]
+            del args[i:i + 2]
+    except (IndexError, ValueError):
+        args = []
+    if len(args) != 1:
+        sys.exit("Usage: python server.py [--compact] "
+                 "[--port N | --unix PATH] directory")
+    directory = args[0]
+
+    print("Loading data...")
+    degrees.load_data(directory, compact)
+    degrees.load_landmarks(directory)
+    print("Data loaded.")
+
+    try:
+        asyncio.run(serve(port, unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
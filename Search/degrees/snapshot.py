@@ -0,0 +1,206 @@
+"""
+Binary snapshot cache for compact degrees graphs.
+
+A snapshot is a directory of .npy arrays, opened memory-mapped, plus a
+manifest recording the size and modification time of the CSV files it
+was built from. String columns are stored as a string table: one array
+of UTF-8 bytes and one array of offsets into it.
+
+A snapshot is never rewritten in place, since other processes may have
+its files mapped: a new one is written to a temporary directory beside
+it and swapped in with renames.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from bisect import bisect_left
+from collections.abc import Mapping
+
+import numpy as np
+
+from graph import INDEX_TYPE, Graph, load_graph
+
+SNAPSHOT_DIRECTORY = ".snapshot"
+SNAPSHOT_VERSION = 1
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_stars"]
+STRINGS = ["person_ids", "person_names", "person_births",
+           "movie_ids", "movie_titles", "movie_years"]
+
+
+class StringTable():
+    """
+    Read-only sequence of strings stored back to back in a byte array.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __getitem__(self, i):
+        start = self.offsets[i]
+        end = self.offsets[i + 1]
+        return self.data[start:end].tobytes().decode("utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class SortedIndex(Mapping):
+    """
+    Read-only mapping from the strings of a StringTable to their
+    positions, searched by bisection over a precomputed sort order.
+    """
+
+    def __init__(self, table, order):
+        self.table = table
+        self.order = order
+
+    def __getitem__(self, key):
+        i = bisect_left(self.order, key, key=self.table.__getitem__)
+        if i < len(self.order) and self.table[self.order[i]] == key:
+            return int(self.order[i])
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.table)
+
+    def __len__(self):
+        return len(self.table)
+
+
+def load_cached_graph(directory):
+    """
+    Load a compact Graph from the snapshot in directory if it is still
+    current, otherwise from the CSV files, writing a fresh snapshot.
+    """
+    path = os.path.join(directory, SNAPSHOT_DIRECTORY)
+    sources = source_stats(directory)
+    graph = load_snapshot(path, sources)
+    if graph is None:
+        graph = load_graph(directory)
+        try:
+            save_snapshot(graph, path, sources)
+        except OSError:
+            pass
+    return graph
+
+
+def source_stats(directory):
+    """
+    Returns the size and modification time of each source CSV file.
+    """
+    stats = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        stats[name] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+def load_snapshot(path, sources):
+    """
+    Returns the Graph stored at path, or None if there is no snapshot
+    or it was built from different source files.
+    """
+    try:
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (manifest.get("version") != SNAPSHOT_VERSION
+            or manifest.get("sources") != sources):
+        return None
+
+    def load(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+    try:
+        arrays = {name: load(name) for name in ARRAYS}
+        strings = {
+            name: StringTable(load(f"{name}_data"), load(f"{name}_offsets"))
+            for name in STRINGS
+        }
+        person_order = load("person_order")
+        movie_order = load("movie_order")
+        name_order = load("name_order")
+    except (OSError, ValueError):
+        return None
+
+    return Graph(**strings, **arrays,
+                 person_index=SortedIndex(strings["person_ids"], person_order),
+                 movie_index=SortedIndex(strings["movie_ids"], movie_order),
+                 name_order=name_order)
+
+
+def save_snapshot(graph, path, sources):
+    """
+    Writes graph to a snapshot at path, tagged with its source files,
+    replacing any snapshot already there without changing its files.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    prefix = os.path.basename(path) + "-"
+    new_path = tempfile.mkdtemp(prefix=prefix, dir=parent)
+    old_path = None
+    try:
+        write_snapshot(graph, new_path, sources)
+
+        # Move the old snapshot aside, so files still mapped from it
+        # stay intact until it is removed
+        if os.path.exists(path):
+            old_path = tempfile.mkdtemp(prefix=prefix, dir=parent)
+            os.replace(path, old_path)
+        os.replace(new_path, path)
+    finally:
+        shutil.rmtree(new_path, ignore_errors=True)
+        if old_path is not None:
+            shutil.rmtree(old_path, ignore_errors=True)
+
+
+def write_snapshot(graph, path, sources):
+    """
+    Writes the files of a snapshot of graph into the directory path.
+    """
+    def save(name, array):
+        np.save(os.path.join(path, f"{name}.npy"), array)
+
+    for name in ARRAYS:
+        save(name, getattr(graph, name))
+    for name in STRINGS:
+        data, offsets = encode_strings(getattr(graph, name))
+        save(f"{name}_data", data)
+        save(f"{name}_offsets", offsets)
+    save("person_order", sort_order(graph.person_ids))
+    save("movie_order", sort_order(graph.movie_ids))
+    save("name_order", graph.sorted_names())
+
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump({"version": SNAPSHOT_VERSION, "sources": sources}, f)
+
+
+def encode_strings(strings):
+    """
+    Returns (data, offsets) arrays of a string table holding strings.
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(string) for string in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return data, offsets
+
+
+def sort_order(strings):
+    """
+    Returns the positions of strings in sorted order.
+    """
+    strings = list(strings)
+    return np.array(
+        sorted(range(len(strings)), key=strings.__getitem__),
+        dtype=INDEX_TYPE
+    )
@@ -0,0 +1,102 @@
+"""
+Background AI for runner.py.
+
+Searches run one at a time on a worker thread, so the UI keeps drawing
+frames while the AI thinks. While waiting for the human, the AI ponders:
+it searches, ahead of time, the boards after the human's likeliest
+moves, so its reply is often ready as soon as the human plays.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from mnk import Game
+
+# Human moves pondered on larger boards, in the engine's move order
+PONDER_MOVES = 3
+
+
+class BackgroundAI():
+    def __init__(self, game, ponder_moves=PONDER_MOVES):
+        # The tictactoe module or an mnk.Game
+        self.game = game
+        self.ponder_moves = ponder_moves
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        # Maps board keys to (future, stop event) for each search
+        # queued, running or finished
+        self.searches = {}
+
+    def request(self, board):
+        """
+        Starts searching for the AI's move on board, if not already
+        started, and stops every other search.
+        """
+        key = board_key(board)
+        for other in list(self.searches):
+            if other != key:
+                self.cancel(other)
+        self.start(board)
+
+    def move(self, board):
+        """
+        Returns the AI's move on board if its search has finished, or
+        None while it is still thinking.
+        """
+        search = self.searches.get(board_key(board))
+        if search is None or not search[0].done():
+            return None
+        return search[0].result()
+
+    def ponder(self, board):
+        """
+        Starts searching the boards after the human's likeliest moves
+        on board, the human's turn.
+        """
+        if self.game.terminal(board):
+            return
+        for action in self.likely_actions(board):
+            reply = self.game.result(board, action)
+            if not self.game.terminal(reply):
+                self.start(reply)
+
+    def reset(self):
+        """Stops and forgets every search."""
+        for key in list(self.searches):
+            self.cancel(key)
+
+    def close(self):
+        self.reset()
+        self.executor.shutdown(wait=True)
+
+    def likely_actions(self, board):
+        if not isinstance(self.game, Game):
+            return self.game.actions(board)
+        actions = [divmod(cell, self.game.n)
+                   for cell in self.game.move_order]
+        actions = [(i, j) for i, j in actions if board[i][j] == Game.EMPTY]
+        return actions[:self.ponder_moves]
+
+    def start(self, board):
+        key = board_key(board)
+        if key in self.searches:
+            return
+        stop = threading.Event()
+        future = self.executor.submit(self.think, board, stop)
+        self.searches[key] = (future, stop)
+
+    def cancel(self, key):
+        future, stop = self.searches.pop(key)
+        future.cancel()
+        stop.set()
+
+    def think(self, board, stop):
+        if stop.is_set():
+            return None
+        if isinstance(self.game, Game):
+            return self.game.minimax(board, stop=stop)
+        return self.game.minimax(board)
+
+
+def board_key(board):
+    return tuple(tuple(row) for row in board)
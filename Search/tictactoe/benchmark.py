@@ -0,0 +1,360 @@
+"""
+Benchmarks for the tic-tac-toe AI over every reachable position.
+
+Usage: python benchmark.py [search|throughput|mcts]
+"""
+
+import contextlib
+import copy
+import math
+import sys
+import time
+
+import tictactoe as ttt
+from mcts import MCTSPlayer
+from mnk import Game
+
+# Head-to-head games of MCTS against minimax per (m, n, k) board, with
+# both given the same seconds per move
+MATCH_BOARDS = [(3, 3, 3), (4, 4, 4), (5, 5, 4)]
+MATCH_GAMES = 10
+MATCH_BUDGET = 0.2
+MATCH_WORKERS = 2
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [search|throughput|mcts]")
+    suite = sys.argv[1] if len(sys.argv) > 1 else "search"
+
+    if suite == "search":
+        benchmark_search()
+    elif suite == "throughput":
+        benchmark_throughput()
+    elif suite == "mcts":
+        benchmark_mcts()
+    else:
+        sys.exit(f"Unknown benchmark: {suite}")
+
+
+def reachable_positions():
+    """
+    Returns every non-terminal board reachable from the initial state,
+    once each, in order of moves played.
+    """
+    positions = []
+    seen = set()
+    level = [ttt.initial_state()]
+    while level:
+        next_level = []
+        for board in level:
+            key = tuple(cell for row in board for cell in row)
+            if key in seen or ttt.terminal(board):
+                continue
+            seen.add(key)
+            positions.append(board)
+            for action in ttt.actions(board):
+                next_level.append(ttt.result(board, action))
+        level = next_level
+    return positions
+
+
+def moves_played(board):
+    return sum(cell != ttt.EMPTY for row in board for cell in row)
+
+
+def plain_value(board, counter):
+    """
+    Returns the minimax value of the board by plain minimax, the way
+    the original engine searched, counting nodes in counter[0].
+    """
+    counter[0] += 1
+    if ttt.terminal(board):
+        return ttt.utility(board)
+    values = [plain_value(ttt.result(board, action), counter)
+              for action in ttt.actions(board)]
+    return max(values) if ttt.player(board) == ttt.X else min(values)
+
+
+def plain_minimax(board, counter):
+    """Returns the move the original engine picked, by plain minimax."""
+    best = None
+    best_value = None
+    maximizing = ttt.player(board) == ttt.X
+    for action in ttt.actions(board):
+        value = plain_value(ttt.result(board, action), counter)
+        if (best_value is None or (maximizing and value > best_value)
+                or (not maximizing and value < best_value)):
+            best, best_value = action, value
+    return best
+
+
+@contextlib.contextmanager
+def counting_nodes():
+    """
+    Counts the positions tictactoe's alphabeta visits while active, in
+    the one-item list it gives, by wrapping alphabeta so that every
+    recursive call goes through the wrapper.
+    """
+    counter = [0]
+    alphabeta = ttt.alphabeta
+
+    def counted(x, o, alpha, beta):
+        counter[0] += 1
+        return alphabeta(x, o, alpha, beta)
+
+    ttt.alphabeta = counted
+    try:
+        yield counter
+    finally:
+        ttt.alphabeta = alphabeta
+
+
+def time_engine(positions, engine):
+    """
+    Runs engine(board, counter) on each position, returning the moves
+    picked, and the total nodes searched and seconds taken per number of
+    moves already played. Calls to alphabeta are counted in counter, a
+    one-item list, and engines add any other nodes they search to it.
+    """
+    moves = []
+    totals = {}
+    for board in positions:
+        with counting_nodes() as counter:
+            start = time.perf_counter()
+            moves.append(engine(board, counter))
+            elapsed = time.perf_counter() - start
+        nodes, seconds = totals.get(moves_played(board), (0, 0))
+        totals[moves_played(board)] = (nodes + counter[0],
+                                       seconds + elapsed)
+    return moves, totals
+
+
+def benchmark_search():
+    """
+    Compares plain minimax, alpha-beta with an empty transposition
+    table on every move, alpha-beta with the table kept between moves
+    and, once built, the opening book, reporting nodes searched and
+    time per move by the number of moves already played. Exits if any
+    engine picks a losing move.
+    """
+    positions = reachable_positions()
+    counts = {}
+    for board in positions:
+        counts[moves_played(board)] = counts.get(moves_played(board), 0) + 1
+
+    def cold(board, counter):
+        ttt.transpositions.clear()
+        return ttt.search(board)
+
+    ttt.transpositions.clear()
+    engines = [("plain", plain_minimax), ("alpha-beta", cold),
+               ("alpha-beta+tt", lambda board, counter: ttt.search(board))]
+    if ttt.opening_book is not None:
+        engines.append(("book", lambda board, counter: ttt.minimax(board)))
+    results = {}
+    for name, engine in engines:
+        results[name] = time_engine(positions, engine)
+
+    # Every engine's move must keep the position's minimax value
+    plain_moves = results["plain"][0]
+    for name, _ in engines[1:]:
+        for board, action, expected in zip(
+            positions, results[name][0], plain_moves
+        ):
+            if action != expected and (
+                plain_value(ttt.result(board, action), [0])
+                != plain_value(ttt.result(board, expected), [0])
+            ):
+                sys.exit(f"{name} picked a worse move than plain minimax.")
+
+    print(f"{'played':>6} {'positions':>9} {'engine':>14} "
+          f"{'nodes/move':>11} {'ms/move':>9}")
+    for played in sorted(counts):
+        for name, _ in engines:
+            nodes, seconds = results[name][1][played]
+            print(f"{played:>6} {counts[played]:>9} {name:>14} "
+                  f"{nodes / counts[played]:>11.1f} "
+                  f"{1000 * seconds / counts[played]:>9.3f}")
+    print(f"{'all':>6} {len(positions):>9}")
+    for name, _ in engines:
+        nodes = sum(total[0] for total in results[name][1].values())
+        seconds = sum(total[1] for total in results[name][1].values())
+        print(f"{'':>6} {'':>9} {name:>14} "
+              f"{nodes / len(positions):>11.1f} "
+              f"{1000 * seconds / len(positions):>9.3f}")
+
+
+def list_player(board):
+    x_count = sum(row.count(ttt.X) for row in board)
+    o_count = sum(row.count(ttt.O) for row in board)
+    return ttt.O if o_count < x_count else ttt.X
+
+
+def list_winner(board):
+    lines = list(board)
+    lines += [[board[i][j] for i in range(3)] for j in range(3)]
+    lines.append([board[i][i] for i in range(3)])
+    lines.append([board[i][2 - i] for i in range(3)])
+    for line in lines:
+        if line[0] == line[1] == line[2] != ttt.EMPTY:
+            return line[0]
+    return None
+
+
+def list_alphabeta(board, alpha, beta, table, counter):
+    """
+    Returns the minimax value of a list of lists board, searching the
+    way the engine did before bitboards: deep-copying the board for
+    every move and rescanning it for the winner and the player to move.
+    """
+    counter[0] += 1
+    won = list_winner(board)
+    if won is not None:
+        return 1 if won == ttt.X else -1
+    if all(cell != ttt.EMPTY for row in board for cell in row):
+        return 0
+
+    key, _ = ttt.canonical(board)
+    entry = table.get(key)
+    if entry is not None:
+        value, flag = entry
+        if (flag == ttt.EXACT
+                or (flag == ttt.LOWER and value >= beta)
+                or (flag == ttt.UPPER and value <= alpha)):
+            return value
+
+    mark = list_player(board)
+    best = -math.inf if mark == ttt.X else math.inf
+    low, high = alpha, beta
+    for i, j in ttt.MOVE_ORDER:
+        if board[i][j] != ttt.EMPTY:
+            continue
+        child = copy.deepcopy(board)
+        child[i][j] = mark
+        v = list_alphabeta(child, low, high, table, counter)
+        if mark == ttt.X:
+            best = max(best, v)
+            low = max(low, best)
+        else:
+            best = min(best, v)
+            high = min(high, best)
+        if low >= high:
+            break
+
+    if best <= alpha:
+        table[key] = (best, ttt.UPPER)
+    elif best >= beta:
+        table[key] = (best, ttt.LOWER)
+    else:
+        table[key] = (best, ttt.EXACT)
+    return best
+
+
+def benchmark_throughput():
+    """
+    Compares nodes per second of alpha-beta search on list of lists
+    boards and on bitboards, solving every reachable position with an
+    empty transposition table, and exits if their values differ.
+    """
+    positions = reachable_positions()
+
+    counter = [0]
+    list_values = []
+    start = time.perf_counter()
+    for board in positions:
+        list_values.append(
+            list_alphabeta(board, -math.inf, math.inf, {}, counter)
+        )
+    list_seconds = time.perf_counter() - start
+
+    def solve_bitboards():
+        values = []
+        for board in positions:
+            ttt.transpositions.clear()
+            x, o = ttt.to_bitboard(board)
+            values.append(ttt.alphabeta(x, o, -math.inf, math.inf))
+        ttt.transpositions.clear()
+        return values
+
+    # Count nodes in a separate run, so counting is not timed
+    with counting_nodes() as bit_counter:
+        solve_bitboards()
+    start = time.perf_counter()
+    bit_values = solve_bitboards()
+    bit_seconds = time.perf_counter() - start
+
+    if list_values != bit_values:
+        sys.exit("Bitboard values differ from list board values.")
+
+    print(f"{'board':>9} {'nodes':>9} {'seconds':>8} {'nodes/s':>10}")
+    for name, nodes, seconds in [("list", counter[0], list_seconds),
+                                 ("bitboard", bit_counter[0],
+                                  bit_seconds)]:
+        print(f"{name:>9} {nodes:>9} {seconds:>8.3f} "
+              f"{nodes / seconds:>10.0f}")
+    print(f"{'speedup':>9} {'':>9} {list_seconds / bit_seconds:>7.1f}x")
+
+
+def play_match(game, players):
+    """
+    Plays one game between players, a dictionary mapping X and O to
+    functions from a board to a move. Returns the winner, or None for a
+    tie, and the total seconds each player spent and moves it made.
+    """
+    board = game.initial_state()
+    seconds = {ttt.X: 0, ttt.O: 0}
+    moves = {ttt.X: 0, ttt.O: 0}
+    while not game.terminal(board):
+        mark = game.player(board)
+        start = time.perf_counter()
+        action = players[mark](board)
+        seconds[mark] += time.perf_counter() - start
+        moves[mark] += 1
+        board = game.result(board, action)
+    return game.winner(board), seconds, moves
+
+
+def benchmark_mcts():
+    """
+    Plays MCTS against iterative-deepening minimax on each board, both
+    with the same time budget per move and taking turns to play X,
+    reporting MCTS's wins, ties and losses and each side's time per
+    move.
+    """
+    print(f"{'board':>7} {'games':>6} {'wins':>5} {'ties':>5} "
+          f"{'losses':>7} {'win rate':>9} {'mcts ms':>8} {'minimax ms':>11}")
+    for m, n, k in MATCH_BOARDS:
+        game = Game(m, n, k, budget=MATCH_BUDGET)
+        results = {"win": 0, "tie": 0, "loss": 0}
+        seconds = {"mcts": 0, "minimax": 0}
+        moves = {"mcts": 0, "minimax": 0}
+        with MCTSPlayer(game, budget=MATCH_BUDGET,
+                        workers=MATCH_WORKERS) as mcts:
+            for i in range(MATCH_GAMES):
+                mcts_mark = ttt.X if i % 2 == 0 else ttt.O
+                minimax_mark = ttt.O if i % 2 == 0 else ttt.X
+                game.transpositions.clear()
+                winner, spent, made = play_match(game, {
+                    mcts_mark: mcts.move, minimax_mark: game.minimax
+                })
+                if winner is None:
+                    results["tie"] += 1
+                elif winner == mcts_mark:
+                    results["win"] += 1
+                else:
+                    results["loss"] += 1
+                for name, mark in [("mcts", mcts_mark),
+                                   ("minimax", minimax_mark)]:
+                    seconds[name] += spent[mark]
+                    moves[name] += made[mark]
+
+        rate = (results["win"] + results["tie"] / 2) / MATCH_GAMES
+        print(f"{f'{m},{n},{k}':>7} {MATCH_GAMES:>6} {results['win']:>5} "
+              f"{results['tie']:>5} {results['loss']:>7} {rate:>9.1%} "
+              f"{1000 * seconds['mcts'] / moves['mcts']:>8.1f} "
+              f"{1000 * seconds['minimax'] / moves['minimax']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
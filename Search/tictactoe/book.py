@@ -0,0 +1,189 @@
+"""
+Opening book for tic-tac-toe: the best move for every reachable
+position, up to rotation and reflection.
+
+Positions are keyed by the base 3 code of their canonical board. The
+codes are placed in a minimal perfect hash table (hash and displace):
+each key's bucket stores a displacement chosen so that no two keys
+share a slot. The file holds BOOK_MAGIC, then, as little-endian
+integers,
+
+    format version, table size n,
+    bucket count r                    (3 x uint16)
+    displacements                     (r x uint16)
+    keys                              (n x uint16)
+    moves                             (n x uint8, cell 3 * i + j)
+
+A file that does not match this layout is ignored, and the engine
+searches instead.
+
+Usage: python book.py
+"""
+
+import os
+import sys
+from array import array
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "book.bin")
+BOOK_MAGIC = b"TTTB"
+BOOK_VERSION = 1
+
+# Average keys per bucket
+BUCKET_SIZE = 4
+MAX_DISPLACEMENT = 0xFFFF
+
+
+class OpeningBook():
+    def __init__(self, displacements, keys, moves):
+        self.displacements = displacements
+        self.keys = keys
+        self.moves = moves
+
+    def get(self, code):
+        """
+        Returns the best cell to play on the canonical board with the
+        given code, or None if the board is not in the book.
+        """
+        if not self.keys:
+            return None
+        bucket = mix(code, 0) % len(self.displacements)
+        slot = mix(code, self.displacements[bucket]) % len(self.keys)
+        if self.keys[slot] != code:
+            return None
+        return self.moves[slot]
+
+
+def mix(key, seed):
+    """Hashes an integer key with a seed to 32 bits."""
+    h = ((key + seed * 0x9E3779B9) * 0x85EBCA6B) & 0xFFFFFFFF
+    return h ^ (h >> 16)
+
+
+def build_book(entries):
+    """
+    Returns an OpeningBook for a dictionary mapping canonical board
+    codes to the cell to play.
+    """
+    n = len(entries)
+    r = max(1, n // BUCKET_SIZE)
+    buckets = [[] for _ in range(r)]
+    for code in entries:
+        buckets[mix(code, 0) % r].append(code)
+
+    displacements = array("H", [0] * r)
+    keys = array("H", [0] * n)
+    moves = array("B", [0] * n)
+    taken = [False] * n
+
+    # Place the largest buckets first, while most slots are free
+    for bucket in sorted(range(r), key=lambda b: -len(buckets[b])):
+        codes = buckets[bucket]
+        if not codes:
+            continue
+        for displacement in range(1, MAX_DISPLACEMENT + 1):
+            slots = {mix(code, displacement) % n for code in codes}
+            if len(slots) == len(codes) and not any(
+                taken[slot] for slot in slots
+            ):
+                break
+        else:
+            raise ValueError("no displacement places every key")
+        displacements[bucket] = displacement
+        for code in codes:
+            slot = mix(code, displacement) % n
+            taken[slot] = True
+            keys[slot] = code
+            moves[slot] = entries[code]
+
+    return OpeningBook(displacements, keys, moves)
+
+
+def save_book(book, path):
+    """Writes an OpeningBook to a binary file."""
+    header = array("H", [BOOK_VERSION, len(book.keys),
+                         len(book.displacements)])
+    with open(path, "wb") as f:
+        f.write(BOOK_MAGIC)
+        little_endian(header).tofile(f)
+        little_endian(book.displacements).tofile(f)
+        little_endian(book.keys).tofile(f)
+        book.moves.tofile(f)
+
+
+def load_book(path):
+    """
+    Reads an OpeningBook written by save_book, or returns None if the
+    file does not exist or is not a book in the current format.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    start = len(BOOK_MAGIC)
+    if len(data) < start + 6 or data[:start] != BOOK_MAGIC:
+        return None
+    version, n, r = read_array("H", data[start:start + 6])
+    start += 6
+    if version != BOOK_VERSION or r < 1 or len(data) != start + 2 * r + 3 * n:
+        return None
+
+    displacements = read_array("H", data[start:start + 2 * r])
+    keys = read_array("H", data[start + 2 * r:start + 2 * r + 2 * n])
+    moves = read_array("B", data[start + 2 * r + 2 * n:])
+    if any(move >= 9 for move in moves):
+        return None
+    return OpeningBook(displacements, keys, moves)
+
+
+def read_array(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    return little_endian(values)
+
+
+def little_endian(values):
+    """
+    Returns an array of integers converted between native and little
+    endian byte order, which is the same conversion both ways.
+    """
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def main():
+    import tictactoe as ttt
+
+    if len(sys.argv) != 1:
+        sys.exit("Usage: python book.py")
+
+    # Solve every canonical position reachable from the initial state
+    entries = {}
+    level = [ttt.initial_state()]
+    while level:
+        next_level = []
+        for board in level:
+            code, _ = ttt.canonical(board)
+            if code in entries or ttt.terminal(board):
+                continue
+            board = ttt.board_for_code(code)
+            i, j = ttt.search(board)
+            entries[code] = 3 * i + j
+            for action in ttt.actions(board):
+                next_level.append(ttt.result(board, action))
+        level = next_level
+
+    book = build_book(entries)
+    for code, cell in entries.items():
+        if book.get(code) != cell:
+            sys.exit("Opening book lookup failed.")
+    save_book(book, BOOK_FILE)
+    print(f"Saved {len(entries)} positions to {BOOK_FILE}.")
+
+
+if __name__ == "__main__":
+    main()
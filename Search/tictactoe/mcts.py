@@ -0,0 +1,198 @@
+"""
+Monte Carlo Tree Search player for m,n,k games.
+
+Each search grows a tree of moves from the current board, choosing
+which branch to explore next by UCT and scoring new leaves with a
+random playout to the end of the game. The most visited move wins.
+
+With several workers, the search is root parallel: every worker process
+grows its own tree from the same board, with its own random playouts,
+and their visit counts are added up before choosing a move.
+"""
+
+import math
+import multiprocessing
+import random
+import time
+
+from mnk import EMPTY, Game, Position
+
+# UCT exploration constant, sqrt(2) in theory
+EXPLORATION = 1.4
+
+DEFAULT_SIMULATIONS = 10000
+
+# Games built by each worker process, by (m, n, k)
+games = {}
+
+
+class Node():
+    def __init__(self, parent, cell, mark, untried):
+        self.parent = parent
+        self.cell = cell
+
+        # Player who marked cell to reach this node
+        self.mark = mark
+
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+
+        # Playouts won by mark through this node, with draws as halves
+        self.wins = 0.0
+
+    def select(self, exploration):
+        """Returns the child with the highest UCT score."""
+        scale = exploration * math.sqrt(math.log(self.visits))
+        return max(
+            self.children,
+            key=lambda child: (child.wins / child.visits
+                               + scale / math.sqrt(child.visits))
+        )
+
+
+class MCTSPlayer():
+    """
+    Plays a Game by MCTS, running up to simulations playouts or for up
+    to budget seconds per move, whichever ends first, over workers
+    processes. Use as a context manager, or call close().
+    """
+
+    def __init__(self, game, simulations=None, budget=None, workers=1,
+                 exploration=EXPLORATION):
+        if simulations is None and budget is None:
+            simulations = DEFAULT_SIMULATIONS
+        self.game = game
+        self.simulations = simulations
+        self.budget = budget
+        self.workers = workers
+        self.exploration = exploration
+
+        # Playouts run for the last move, for benchmarking
+        self.simulations_run = 0
+
+        self.pool = None
+        if workers > 1:
+            self.pool = multiprocessing.Pool(workers)
+
+    def move(self, board):
+        """
+        Returns the most visited action (i, j) for the current player,
+        or None if the game is over.
+        """
+        if self.game.terminal(board):
+            return None
+
+        simulations = self.simulations
+        if simulations is not None:
+            simulations = -(-simulations // self.workers)
+        tasks = [
+            ((self.game.m, self.game.n, self.game.k), board, simulations,
+             self.budget, self.exploration, random.randrange(2 ** 32))
+            for _ in range(self.workers)
+        ]
+        if self.pool is None:
+            results = [grow_tree(tasks[0])]
+        else:
+            results = self.pool.map(grow_tree, tasks)
+
+        visits = {}
+        self.simulations_run = 0
+        for counts, simulations_run in results:
+            self.simulations_run += simulations_run
+            for cell, count in counts.items():
+                visits[cell] = visits.get(cell, 0) + count
+        cell = max(visits, key=visits.get)
+        return divmod(cell, self.game.n)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def grow_tree(task):
+    """
+    Grows one search tree from a board, returning the visits of each
+    cell played from the root and the number of playouts run.
+    """
+    dimensions, board, simulations, budget, exploration, seed = task
+    if dimensions not in games:
+        games[dimensions] = Game(*dimensions)
+    game = games[dimensions]
+    rng = random.Random(seed)
+
+    position = Position(game, board)
+    root = Node(None, None, None, empty_cells(position))
+    deadline = None if budget is None else time.perf_counter() + budget
+    played = 0
+
+    # Always play out once, so the root has a child to choose
+    while True:
+        simulate(root, position, exploration, rng)
+        played += 1
+        if simulations is not None and played >= simulations:
+            break
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+
+    return {child.cell: child.visits for child in root.children}, played
+
+
+def simulate(root, position, exploration, rng):
+    """
+    Runs one playout from root: selects a leaf by UCT, adds one child
+    to it, plays randomly to the end of the game and records the result
+    along the path. Leaves position as it was.
+    """
+    node = root
+    moves = 0
+
+    # Selection
+    while not node.untried and node.children:
+        node = node.select(exploration)
+        position.play(node.cell)
+        moves += 1
+
+    # Expansion
+    if node.untried and position.winner is None:
+        cell = node.untried.pop(rng.randrange(len(node.untried)))
+        mark = position.turn
+        position.play(cell)
+        moves += 1
+        child = Node(node, cell, mark, empty_cells(position))
+        node.children.append(child)
+        node = child
+
+    # Playout
+    empty = empty_cells(position)
+    rng.shuffle(empty)
+    while position.winner is None and empty:
+        position.play(empty.pop())
+        moves += 1
+    winner = position.winner
+
+    # Backpropagation
+    while node is not None:
+        node.visits += 1
+        if winner is None:
+            node.wins += 0.5
+        elif winner == node.mark:
+            node.wins += 1
+        node = node.parent
+
+    for _ in range(moves):
+        position.undo()
+
+
+def empty_cells(position):
+    if position.winner is not None:
+        return []
+    return [cell for cell, mark in enumerate(position.cells) if mark == EMPTY]
@@ -0,0 +1,388 @@
+"""
+m,n,k games: two players take turns marking the cells of an m by n
+board, and the first to get k marks in a row, column or diagonal wins.
+Tic-tac-toe is the 3,3,3 game.
+
+A Game has the same functions as tictactoe, so runner.py can play any
+m,n,k game. Its AI runs iterative-deepening alpha-beta search within a
+time budget per move, scoring positions it cannot search to the end
+with a heuristic evaluation.
+"""
+
+import math
+import random
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Seconds the AI may think per move
+DEFAULT_BUDGET = 1.0
+
+# Value of a won position, plus the number of empty cells left so that
+# quicker wins score higher
+WIN_SCORE = 1000000
+
+# Nodes searched between checks of the clock
+CLOCK_INTERVAL = 1024
+
+# Transposition table entries kept before it is cleared
+MAX_TRANSPOSITIONS = 1000000
+
+# Transposition table flags: the stored value is exact, or only a
+# lower or upper bound on the true value
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Steps along a row, a column and both diagonals
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Game():
+    X = X
+    O = O
+    EMPTY = EMPTY
+
+    def __init__(self, m, n, k, budget=DEFAULT_BUDGET):
+        if m < 1 or n < 1 or not 1 <= k <= max(m, n):
+            raise ValueError(f"{k} in a row does not fit on a {m} by {n} "
+                             f"board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.budget = budget
+
+        # Every run of k cells, indexed i * n + j, that wins if one
+        # player marks all of them
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in DIRECTIONS:
+                    if (0 <= i + (k - 1) * di < m
+                            and 0 <= j + (k - 1) * dj < n):
+                        self.windows.append(tuple(
+                            (i + t * di) * n + j + t * dj for t in range(k)
+                        ))
+
+        # Indices of the windows through each cell
+        self.cell_windows = [[] for _ in range(m * n)]
+        for w, window in enumerate(self.windows):
+            for cell in window:
+                self.cell_windows[cell].append(w)
+
+        # Cells on the most windows first, which generalizes playing
+        # the center and then the corners
+        self.move_order = sorted(
+            range(m * n), key=lambda cell: -len(self.cell_windows[cell])
+        )
+
+        # contribution[x * (k + 1) + o] is the score, for X, of a window
+        # holding x marks of X and o marks of O: only windows one
+        # player can still complete count
+        weights = [0] + [4 ** marks for marks in range(1, k)] + [0]
+        self.contribution = []
+        for x in range(k + 1):
+            for o in range(k + 1):
+                if o == 0:
+                    self.contribution.append(weights[x])
+                elif x == 0:
+                    self.contribution.append(-weights[o])
+                else:
+                    self.contribution.append(0)
+
+        # Zobrist keys for a mark of X or O in each cell
+        rng = random.Random(0)
+        self.zobrist = {
+            mark: [rng.getrandbits(64) for _ in range(m * n)]
+            for mark in [X, O]
+        }
+
+        # Maps position hashes to (depth, value, flag, best cell)
+        self.transpositions = {}
+
+        # Statistics of the last search, for benchmarking
+        self.nodes_searched = 0
+        self.depth_reached = 0
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x_count = sum(row.count(X) for row in board)
+        o_count = sum(row.count(O) for row in board)
+        return X if x_count <= o_count else O
+
+    def actions(self, board):
+        """
+        Returns the list of all possible actions (i, j) on the board.
+        """
+        return [(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] == EMPTY]
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the
+        board.
+        """
+        if board[action[0]][action[1]] != EMPTY:
+            raise NameError('illegal move')
+        board_new = [row[:] for row in board]
+        board_new[action[0]][action[1]] = self.player(board)
+        return board_new
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        return Position(self, board).winner
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        position = Position(self, board)
+        return position.winner is not None or position.empty == 0
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner(board)
+        if winner == X:
+            return 1
+        elif winner == O:
+            return -1
+        return 0
+
+    def minimax(self, board, budget=None, stop=None):
+        """
+        Returns the best action found for the current player on the
+        board within budget seconds, by default self.budget, deepening
+        the search one move at a time until the budget runs out or the
+        result of the game is known. The search also ends early once
+        stop, a threading.Event, is set.
+        """
+        position = Position(self, board)
+        if position.winner is not None or position.empty == 0:
+            return None
+        if budget is None:
+            budget = self.budget
+        deadline = time.perf_counter() + budget
+        if len(self.transpositions) > MAX_TRANSPOSITIONS:
+            self.transpositions.clear()
+
+        self.nodes_searched = 0
+        self.depth_reached = 0
+        moves = [cell for cell in self.move_order
+                 if position.cells[cell] == EMPTY]
+        best = moves[0]
+        for depth in range(1, position.empty + 1):
+            try:
+                value, best = self.search_root(position, moves, depth,
+                                               deadline, stop)
+            except SearchTimeout:
+                break
+            self.depth_reached = depth
+
+            # Search the best move so far first at the next depth
+            moves.remove(best)
+            moves.insert(0, best)
+            if abs(value) >= WIN_SCORE:
+                break
+
+        return divmod(best, self.n)
+
+    def search_root(self, position, moves, depth, deadline, stop=None):
+        """
+        Returns (value, cell) for the best of moves, searched depth
+        moves deep.
+        """
+        alpha = -math.inf
+        best = moves[0]
+        for cell in moves:
+            position.play(cell)
+            value = -self.negamax(position, depth - 1, -math.inf, -alpha,
+                                  deadline, stop)
+            position.undo()
+            if value > alpha:
+                alpha = value
+                best = cell
+        return alpha, best
+
+    def negamax(self, position, depth, alpha, beta, deadline, stop=None):
+        """
+        Returns the value of position for the player to move, searched
+        depth moves deep with alpha-beta pruning. Values outside
+        (alpha, beta) are only bounds on the true value. Raises
+        SearchTimeout once the deadline has passed or stop is set.
+        """
+        self.nodes_searched += 1
+        if self.nodes_searched % CLOCK_INTERVAL == 0 and (
+            time.perf_counter() > deadline
+            or (stop is not None and stop.is_set())
+        ):
+            raise SearchTimeout
+
+        if position.winner is not None:
+            return -(WIN_SCORE + position.empty)
+        if position.empty == 0:
+            return 0
+        if depth == 0:
+            return position.score if position.turn == X else -position.score
+
+        entry = self.transpositions.get(position.hash)
+        first = None
+        if entry is not None:
+            entry_depth, value, flag, first = entry
+            if entry_depth >= depth and (
+                flag == EXACT
+                or (flag == LOWER and value >= beta)
+                or (flag == UPPER and value <= alpha)
+            ):
+                return value
+
+        best = -math.inf
+        best_cell = None
+        low = alpha
+        for cell in self.ordered_moves(position, first):
+            position.play(cell)
+            value = -self.negamax(position, depth - 1, -beta, -low,
+                                  deadline, stop)
+            position.undo()
+            if value > best:
+                best = value
+                best_cell = cell
+                if best > low:
+                    low = best
+                    if low >= beta:
+                        break
+
+        if best <= alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.transpositions[position.hash] = (depth, best, flag, best_cell)
+        return best
+
+    def ordered_moves(self, position, first=None):
+        """
+        Returns the empty cells of position in search order, starting
+        with first, the best move found by an earlier search, if any.
+        """
+        cells = position.cells
+        moves = [cell for cell in self.move_order
+                 if cells[cell] == EMPTY and cell != first]
+        if first is not None:
+            moves.insert(0, first)
+        return moves
+
+
+class Position():
+    """
+    A board being searched. Mark counts per window, the heuristic score
+    and the Zobrist hash are updated incrementally as moves are played
+    and undone, and a move wins if it completes a window through its
+    cell.
+    """
+
+    def __init__(self, game, board):
+        self.game = game
+        self.cells = [cell for row in board for cell in row]
+        self.empty = self.cells.count(EMPTY)
+        self.turn = X if self.cells.count(X) <= self.cells.count(O) else O
+        self.history = []
+        self.winner = None
+
+        self.x_counts = []
+        self.o_counts = []
+        self.score = 0
+        for window in game.windows:
+            x = sum(self.cells[cell] == X for cell in window)
+            o = sum(self.cells[cell] == O for cell in window)
+            self.x_counts.append(x)
+            self.o_counts.append(o)
+            self.score += game.contribution[x * (game.k + 1) + o]
+            if x == game.k:
+                self.winner = X
+            elif o == game.k:
+                self.winner = O
+
+        self.hash = 0
+        for cell, mark in enumerate(self.cells):
+            if mark != EMPTY:
+                self.hash ^= game.zobrist[mark][cell]
+
+    def play(self, cell):
+        """Marks cell for the player to move."""
+        game = self.game
+        mark = self.turn
+        k = game.k
+        width = k + 1
+        contribution = game.contribution
+        x_counts = self.x_counts
+        o_counts = self.o_counts
+
+        won = False
+        for w in game.cell_windows[cell]:
+            x = x_counts[w]
+            o = o_counts[w]
+            before = contribution[x * width + o]
+            if mark == X:
+                x += 1
+                x_counts[w] = x
+                won = won or x == k
+            else:
+                o += 1
+                o_counts[w] = o
+                won = won or o == k
+            self.score += contribution[x * width + o] - before
+
+        self.cells[cell] = mark
+        self.hash ^= game.zobrist[mark][cell]
+        self.empty -= 1
+        self.history.append(cell)
+        self.turn = O if mark == X else X
+        if won:
+            self.winner = mark
+
+    def undo(self):
+        """Takes back the last move played."""
+        game = self.game
+        cell = self.history.pop()
+        mark = self.cells[cell]
+        width = game.k + 1
+        contribution = game.contribution
+        x_counts = self.x_counts
+        o_counts = self.o_counts
+
+        for w in game.cell_windows[cell]:
+            x = x_counts[w]
+            o = o_counts[w]
+            before = contribution[x * width + o]
+            if mark == X:
+                x -= 1
+                x_counts[w] = x
+            else:
+                o -= 1
+                o_counts[w] = o
+            self.score += contribution[x * width + o] - before
+
+        self.cells[cell] = EMPTY
+        self.hash ^= game.zobrist[mark][cell]
+        self.empty += 1
+        self.turn = mark
+        self.winner = None
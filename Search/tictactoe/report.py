@@ -0,0 +1,281 @@
+"""
+Headless performance report for the tic-tac-toe engine.
+
+Plays every opening (each first and second move) to the end, and
+random self-play games in which each move is random with probability
+SELF_PLAY_RANDOMNESS, with minimax choosing for both players from an
+empty transposition table each game. Records the results, nodes per
+second, time per function in tictactoe from cProfile and peak traced
+memory, and writes them as JSON. With --no-book, the opening book is
+turned off so that every move is searched. Given a baseline report
+from another commit, also prints the change in each measurement and
+exits with an error if any got worse by more than REGRESSION_THRESHOLD.
+
+Usage: python report.py [--no-book] [output] [baseline]
+"""
+
+import cProfile
+import json
+import platform
+import pstats
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import tictactoe as ttt
+from benchmark import counting_nodes
+
+SELF_PLAY_GAMES = 500
+SELF_PLAY_RANDOMNESS = 0.3
+SEED = 0
+
+DEFAULT_OUTPUT = "report.json"
+
+# Largest allowed ratio of a measurement to its baseline
+REGRESSION_THRESHOLD = 1.25
+
+# Functions taking less time than this are too noisy to compare
+MIN_COMPARED_SECONDS = 0.01
+
+
+def main():
+    args = sys.argv[1:]
+    book = "--no-book" not in args
+    if not book:
+        args.remove("--no-book")
+    if len(args) > 2:
+        sys.exit("Usage: python report.py [--no-book] [output] [baseline]")
+    output = args[0] if len(args) > 0 else DEFAULT_OUTPUT
+    baseline = args[1] if len(args) > 1 else None
+
+    if not book:
+        ttt.opening_book = None
+    report = build_report()
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Wrote {output}.")
+    print_report(report)
+
+    if baseline is not None:
+        with open(baseline) as f:
+            regressions = compare(json.load(f), report)
+        if regressions:
+            sys.exit(f"{regressions} measurements regressed.")
+
+
+def openings():
+    """
+    Returns every board after one or two moves from the initial state.
+    """
+    boards = []
+    for first in ttt.actions(ttt.initial_state()):
+        board = ttt.result(ttt.initial_state(), first)
+        boards.append(board)
+        for second in ttt.actions(board):
+            boards.append(ttt.result(board, second))
+    return boards
+
+
+def play(board, rng=None, randomness=0):
+    """
+    Plays board to the end, choosing each move with minimax unless it
+    is made at random, with probability randomness. Returns the number
+    of moves and the winner, or None for a draw.
+    """
+    ttt.transpositions.clear()
+    moves = 0
+    while not ttt.terminal(board):
+        if rng is not None and rng.random() < randomness:
+            action = rng.choice(ttt.actions(board))
+        else:
+            action = ttt.minimax(board)
+        board = ttt.result(board, action)
+        moves += 1
+    if ttt.utility(board) == 0:
+        return moves, None
+    return moves, ttt.winner(board)
+
+
+def play_games(boards, rng=None, randomness=0):
+    """
+    Plays each board to the end, returning the number of moves and
+    wins for X, wins for O and draws.
+    """
+    total = 0
+    results = {"X": 0, "O": 0, "draw": 0}
+    for board in boards:
+        moves, winner = play(board, rng, randomness)
+        total += moves
+        results[winner or "draw"] += 1
+    return total, results
+
+
+def workloads():
+    """
+    Returns a dictionary mapping the name of each workload to a function
+    that plays its games, returning their moves and results.
+    """
+    boards = openings()
+    return {
+        "openings": lambda: play_games(boards),
+        "self_play": lambda: play_games(
+            [ttt.initial_state() for _ in range(SELF_PLAY_GAMES)],
+            random.Random(SEED), SELF_PLAY_RANDOMNESS
+        )
+    }
+
+
+def run_workloads(count=True):
+    """
+    Runs each workload, returning its games, results, moves, nodes and
+    seconds. Nodes are counted in a second, untimed run, or left out if
+    count is False.
+    """
+    results = {}
+    for name, play in workloads().items():
+        start = time.perf_counter()
+        moves, games = play()
+        seconds = time.perf_counter() - start
+        results[name] = {
+            "games": sum(games.values()),
+            "results": games,
+            "moves": moves,
+            "seconds": seconds,
+            "ms_per_move": 1000 * seconds / moves
+        }
+        if count:
+            with counting_nodes() as counter:
+                play()
+            results[name]["nodes"] = counter[0]
+            results[name]["nodes_per_second"] = counter[0] / seconds
+    return results
+
+
+def profile_functions():
+    """
+    Runs the workloads under cProfile, returning the calls, own time and
+    cumulative time of each function defined in tictactoe, with
+    comprehensions named by their line.
+    """
+    profiler = cProfile.Profile()
+    profiler.runcall(run_workloads, False)
+    stats = pstats.Stats(profiler)
+
+    functions = {}
+    for (filename, line, name), row in stats.stats.items():
+        if filename != ttt.__file__:
+            continue
+        if name.startswith("<"):
+            name = f"{name}:{line}"
+        _, calls, own, cumulative, _ = row
+        functions[name] = {
+            "calls": calls,
+            "seconds": own,
+            "cumulative_seconds": cumulative
+        }
+    return functions
+
+
+def peak_memory():
+    """
+    Returns the most memory, in bytes, allocated at once while running
+    the workloads.
+    """
+    tracemalloc.start()
+    try:
+        run_workloads(False)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def build_report():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "book": ttt.opening_book is not None,
+        "workloads": run_workloads(),
+        "functions": profile_functions(),
+        "peak_memory_bytes": peak_memory()
+    }
+
+
+def print_report(report):
+    print(f"opening book: {'on' if report['book'] else 'off'}\n")
+    print(f"{'workload':>10} {'games':>6} {'X-O-draw':>12} {'moves':>6} "
+          f"{'nodes':>8} {'nodes/s':>9} {'ms/move':>8}")
+    for name, workload in report["workloads"].items():
+        results = workload["results"]
+        results = f"{results['X']}-{results['O']}-{results['draw']}"
+        print(f"{name:>10} {workload['games']:>6} {results:>12} "
+              f"{workload['moves']:>6} {workload['nodes']:>8} "
+              f"{workload['nodes_per_second']:>9.0f} "
+              f"{workload['ms_per_move']:>8.3f}")
+
+    print(f"\n{'function':>16} {'calls':>8} {'own s':>8} {'total s':>8}")
+    functions = sorted(report["functions"].items(),
+                       key=lambda item: -item[1]["seconds"])
+    for name, function in functions:
+        print(f"{name:>16} {function['calls']:>8} "
+              f"{function['seconds']:>8.3f} "
+              f"{function['cumulative_seconds']:>8.3f}")
+
+    print(f"\npeak memory: {report['peak_memory_bytes'] / 1024:.1f} KiB")
+
+
+def compare(baseline, report):
+    """
+    Prints each measurement of report against baseline, worse first,
+    and returns how many got worse by more than REGRESSION_THRESHOLD.
+    """
+    # (name, baseline value, new value), where higher is worse
+    measurements = []
+    for name, workload in report["workloads"].items():
+        if name in baseline["workloads"]:
+            old = baseline["workloads"][name]
+            measurements.append((f"{name} ms/move", old["ms_per_move"],
+                                 workload["ms_per_move"]))
+            measurements.append((f"{name} nodes", old["nodes"],
+                                 workload["nodes"]))
+    for name, function in report["functions"].items():
+        if name not in baseline["functions"]:
+            continue
+        old = baseline["functions"][name]["seconds"]
+        if max(old, function["seconds"]) >= MIN_COMPARED_SECONDS:
+            measurements.append((f"{name} seconds", old,
+                                 function["seconds"]))
+    measurements.append(("peak memory", baseline["peak_memory_bytes"],
+                         report["peak_memory_bytes"]))
+
+    ratios = [(new / old if old else 1, name, old, new)
+              for name, old, new in measurements]
+    ratios.sort(reverse=True)
+
+    print(f"\nagainst {baseline['commit']}:")
+    if baseline.get("book") != report["book"]:
+        print("warning: the baseline was run with the opening book "
+              f"{'on' if baseline.get('book') else 'off'}")
+    print(f"{'measurement':>28} {'baseline':>12} {'new':>12} {'ratio':>7}")
+    regressions = 0
+    for ratio, name, old, new in ratios:
+        flag = ""
+        if ratio > REGRESSION_THRESHOLD:
+            regressions += 1
+            flag = " worse"
+        print(f"{name:>28} {old:>12.4g} {new:>12.4g} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    main()
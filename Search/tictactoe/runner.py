@@ -3,10 +3,30 @@ import sys
 import time
 
 import tictactoe as ttt
+from background import BackgroundAI
+from mnk import Game
+
+# python runner.py [m n k] plays k in a row on an m by n board
+if len(sys.argv) not in [1, 4]:
+    sys.exit("Usage: python runner.py [m n k]")
+if len(sys.argv) == 4:
+    m, n, k = (int(arg) for arg in sys.argv[1:])
+else:
+    m, n, k = 3, 3, 3
+if (m, n, k) == (3, 3, 3):
+    game = ttt
+    game_name = "Tic-Tac-Toe"
+else:
+    game = Game(m, n, k)
+    game_name = f"{k} in a Row"
 
 pygame.init()
 size = width, height = 600, 400
 
+# Frames drawn per second, and least seconds the AI appears to think
+FPS = 30
+AI_DELAY = 0.5
+
 # Colors
 black = (0, 0, 0)
 white = (255, 255, 255)
@@ -18,13 +38,16 @@ largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = game.initial_state()
+ai = BackgroundAI(game)
+ai_started = None
+clock = pygame.time.Clock()
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            ai.close()
             sys.exit()
 
     screen.fill(black)
@@ -33,7 +56,7 @@ while True:
     if user is None:
 
         # Draw title
-        title = largeFont.render("Play Tic-Tac-Toe", True, white)
+        title = largeFont.render(f"Play {game_name}", True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 50)
         screen.blit(title, titleRect)
@@ -59,21 +82,21 @@ while True:
             mouse = pygame.mouse.get_pos()
             if playXButton.collidepoint(mouse):
                 time.sleep(0.2)
-                user = ttt.X
+                user = game.X
             elif playOButton.collidepoint(mouse):
                 time.sleep(0.2)
-                user = ttt.O
+                user = game.O
 
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_size = min(80, (height - 160) // m, (width - 40) // n)
+        tile_origin = (width / 2 - (n / 2 * tile_size),
+                       height / 2 - (m / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(m):
             row = []
-            for j in range(3):
+            for j in range(n):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -81,20 +104,25 @@ while True:
                 )
                 pygame.draw.rect(screen, white, rect, 3)
 
-                if board[i][j] != ttt.EMPTY:
+                if board[i][j] != game.EMPTY:
                     move = moveFont.render(board[i][j], True, white)
+                    if tile_size < 80:
+                        move = pygame.transform.smoothscale(
+                            move, (move.get_width() * tile_size // 80,
+                                   move.get_height() * tile_size // 80)
+                        )
                     moveRect = move.get_rect()
                     moveRect.center = rect.center
                     screen.blit(move, moveRect)
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = game.terminal(board)
+        player = game.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = game.winner(board)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -102,30 +130,35 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = int(3 * time.time()) % 4
+            title = "Computer thinking" + "." * dots + " " * (3 - dots)
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, computed in the background
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_started is None:
+                ai_started = time.time()
+                ai.request(board)
+            move = ai.move(board)
+            if move is not None and time.time() - ai_started >= AI_DELAY:
+                board = game.result(board, move)
+                ai_started = None
+
+        # Think about replies while the user decides
+        if user == player and not game_over:
+            ai.ponder(board)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
-                    if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
+            for i in range(m):
+                for j in range(n):
+                    if (board[i][j] == game.EMPTY and tiles[i][j].collidepoint(mouse)):
+                        board = game.result(board, (i, j))
 
         if game_over:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
@@ -140,7 +173,9 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    board = game.initial_state()
+                    ai.reset()
+                    ai_started = None
 
     pygame.display.flip()
+    clock.tick(FPS)
@@ -1,14 +1,86 @@
 """
 Tic Tac Toe Player
+
+The AI searches bitboards: a pair of 9-bit masks (x, o) in which bit
+3 * i + j is set if that player has a mark in cell (i, j). The runner's
+list of lists boards convert to and from bitboards with to_bitboard
+and from_bitboard.
 """
 
-import copy
 import math
 
+from book import BOOK_FILE, load_book
+
 X = "X"
 O = "O"
 EMPTY = None
 
+# Mask with every cell set
+FULL = 0b111111111
+
+# Rows, columns and diagonals
+WIN_LINES = [0b000000111, 0b000111000, 0b111000000,
+             0b001001001, 0b010010010, 0b100100100,
+             0b100010001, 0b001010100]
+
+# WINNING[mask] is True if the cells in mask cover a whole line
+WINNING = [
+    any(mask & line == line for line in WIN_LINES) for mask in range(512)
+]
+
+# COUNTS[mask] is the number of cells in mask
+COUNTS = [bin(mask).count("1") for mask in range(512)]
+
+# Cell indices (3 * i + j) of a board under each of its 8 rotations
+# and reflections
+SYMMETRIES = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8],
+    [6, 3, 0, 7, 4, 1, 8, 5, 2],
+    [8, 7, 6, 5, 4, 3, 2, 1, 0],
+    [2, 5, 8, 1, 4, 7, 0, 3, 6],
+    [2, 1, 0, 5, 4, 3, 8, 7, 6],
+    [6, 7, 8, 3, 4, 5, 0, 1, 2],
+    [0, 3, 6, 1, 4, 7, 2, 5, 8],
+    [8, 5, 2, 7, 4, 1, 6, 3, 0]
+]
+
+
+def code_table(symmetry):
+    """
+    Returns a list mapping each mask to its cells' share of the base 3
+    code of a board transformed by symmetry, counting each cell as 1.
+    """
+    weights = [0] * 9
+    for k, cell in enumerate(symmetry):
+        weights[cell] = 3 ** (8 - k)
+    table = [0] * 512
+    for mask in range(1, 512):
+        low = mask & -mask
+        table[mask] = table[mask ^ low] + weights[low.bit_length() - 1]
+    return table
+
+
+# CODES[s][x] + 2 * CODES[s][o] is the base 3 code of the board (x, o)
+# transformed by SYMMETRIES[s]
+CODES = [code_table(symmetry) for symmetry in SYMMETRIES]
+
+# Center, corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+MOVE_MASKS = [1 << (3 * i + j) for i, j in MOVE_ORDER]
+
+# Transposition table flags: the stored value is exact, or only a
+# lower or upper bound on the true value
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Maps canonical board codes to (value, flag)
+transpositions = {}
+
+# Best moves for canonical positions, if book.py has built the book
+opening_book = load_book(BOOK_FILE)
+
 
 def initial_state():
     """
@@ -23,23 +95,8 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-
-    x_count = 0
-    o_count = 0
-
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] == 'X':
-                x_count += 1
-            elif board[i][j] == 'O':
-                o_count += 1
-
-    if x_count < o_count:
-        return 'X'
-    elif o_count < x_count:
-        return 'O'
-    else:
-        return 'X'
+    x, o = to_bitboard(board)
+    return X if COUNTS[x] <= COUNTS[o] else O
 
 
 def actions(board):
@@ -64,7 +121,7 @@ def result(board, action):
     if board[action[0]][action[1]] != EMPTY:
         raise NameError('illegal move')
     else:
-        board_new = copy.deepcopy(board)
+        board_new = [row[:] for row in board]
         board_new[action[0]][action[1]] = player(board)
         return board_new
 
@@ -73,41 +130,19 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    for i in range(3):
-        if board[i][0] == board[i][1] == board[i][2] != EMPTY:
-            return board[i][0]
-    for i in range(3):
-        if board[0][i] == board[1][i] == board[2][i] != EMPTY:
-            return board[0][i]
-    if board[0][0] == board[1][1] == board[2][2] != EMPTY:
-        return board[1][1]
-    elif board[2][0] == board[1][1] == board[0][2] != EMPTY:
-        return board[1][1]
+    x, o = to_bitboard(board)
+    if WINNING[x]:
+        return X
+    elif WINNING[o]:
+        return O
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    empty_cells = 0
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] == EMPTY:
-                empty_cells += 1
-    if empty_cells == 0:
-        return True
-
-    if board[0][0] == board[1][1] == board[2][2] != EMPTY:
-        return True
-    elif board[2][0] == board[1][1] == board[0][2] != EMPTY:
-        return True
-    for i in range(3):
-        if board[i][0] == board[i][1] == board[i][2] != EMPTY:
-            return True
-    for i in range(3):
-        if board[0][i] == board[1][i] == board[2][i] != EMPTY:
-            return True
-    return False
+    x, o = to_bitboard(board)
+    return WINNING[x] or WINNING[o] or x | o == FULL
 
 
 def utility(board):
@@ -122,6 +157,37 @@ def utility(board):
         return 0
 
 
+def to_bitboard(board):
+    """
+    Returns the (x, o) masks of a list of lists board.
+    """
+    x = 0
+    o = 0
+    bit = 1
+    for row in board:
+        for cell in row:
+            if cell == X:
+                x |= bit
+            elif cell == O:
+                o |= bit
+            bit <<= 1
+    return x, o
+
+
+def from_bitboard(x, o):
+    """
+    Returns the list of lists board with the (x, o) masks.
+    """
+    board = initial_state()
+    for i in range(3):
+        for j in range(3):
+            if x >> (3 * i + j) & 1:
+                board[i][j] = X
+            elif o >> (3 * i + j) & 1:
+                board[i][j] = O
+    return board
+
+
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
@@ -129,45 +195,135 @@ def minimax(board):
     if terminal(board):
         return None
 
-    # when player is MaxPlayer
+    if opening_book is not None:
+        code, symmetry = canonical(board)
+        cell = opening_book.get(code)
+        if cell is not None:
+            return divmod(symmetry[cell], 3)
 
-    elif player(board) == 'X':
-        v = -1000
-        i = 0
-        j = 0
-        for action in actions(board):
-            if MinPlayer(result(board, action)) > v:
-                i, j = action
-                v = MinPlayer(result(board, action))
+    return search(board)
 
-        return (i, j)
 
-    # when player is MinPlayer
+def search(board):
+    """
+    Returns the optimal action for the current player on a non-terminal
+    board, found by alpha-beta search.
+    """
+    x, o = to_bitboard(board)
+    maximizing = COUNTS[x] == COUNTS[o]
+    alpha = -math.inf
+    beta = math.inf
+    best_move = None
+    for move in MOVE_MASKS:
+        if (x | o) & move:
+            continue
+        if maximizing:
+            v = alphabeta(x | move, o, alpha, beta)
+            if v > alpha:
+                alpha = v
+                best_move = move
+        else:
+            v = alphabeta(x, o | move, alpha, beta)
+            if v < beta:
+                beta = v
+                best_move = move
+
+    return divmod(best_move.bit_length() - 1, 3)
+
+
+def alphabeta(x, o, alpha, beta):
+    """
+    Returns the minimax value of the bitboard (x, o), searching with
+    alpha-beta pruning and caching values in the transposition table.
+    Values outside (alpha, beta) are only bounds on the true value.
+    """
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    occupied = x | o
+    if occupied == FULL:
+        return 0
 
+    key = canonical_code(x, o)
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, flag = entry
+        if (flag == EXACT
+                or (flag == LOWER and value >= beta)
+                or (flag == UPPER and value <= alpha)):
+            return value
+
+    low, high = alpha, beta
+    if COUNTS[x] == COUNTS[o]:
+        best = -math.inf
+        for move in MOVE_MASKS:
+            if occupied & move:
+                continue
+            v = alphabeta(x | move, o, low, high)
+            if v > best:
+                best = v
+                if best > low:
+                    low = best
+                    if low >= high:
+                        break
+    else:
+        best = math.inf
+        for move in MOVE_MASKS:
+            if occupied & move:
+                continue
+            v = alphabeta(x, o | move, low, high)
+            if v < best:
+                best = v
+                if best < high:
+                    high = best
+                    if low >= high:
+                        break
+
+    if best <= alpha:
+        transpositions[key] = (best, UPPER)
+    elif best >= beta:
+        transpositions[key] = (best, LOWER)
     else:
-        v = 1000
-        i = 0
-        j = 0
-        for action in actions(board):
-            if MaxPlayer(result(board, action)) < v:
-                i, j = action
-                v = MaxPlayer(result(board, action))
-        return (i, j)
+        transpositions[key] = (best, EXACT)
+    return best
 
 
-def MinPlayer(board):
-    if terminal(board):
-        return utility(board)
-    v = 1000
-    for action in actions(board):
-        v = min(v, MaxPlayer(result(board, action)))
-    return v
+def canonical_code(x, o):
+    """
+    Returns the base 3 code of the bitboard's canonical form: its
+    rotation or reflection with the lowest code, shared by every board
+    with the same minimax value up to symmetry.
+    """
+    best = CODES[0][x] + 2 * CODES[0][o]
+    for codes in CODES:
+        code = codes[x] + 2 * codes[o]
+        if code < best:
+            best = code
+    return best
 
 
-def MaxPlayer(board):
-    if terminal(board):
-        return utility(board)
-    v = -1000
-    for action in actions(board):
-        v = max(v, MinPlayer(result(board, action)))
-    return v
+def canonical(board):
+    """
+    Returns (code, symmetry) for the board's canonical form. Cell k of
+    the canonical board is cell symmetry[k] of the board.
+    """
+    x, o = to_bitboard(board)
+    best = None
+    for codes, symmetry in zip(CODES, SYMMETRIES):
+        code = codes[x] + 2 * codes[o]
+        if best is None or code < best[0]:
+            best = (code, symmetry)
+    return best
+
+
+def board_for_code(code):
+    """
+    Returns the board with the given base 3 code.
+    """
+    cells = []
+    for _ in range(9):
+        code, digit = divmod(code, 3)
+        cells.append([EMPTY, X, O][digit])
+    cells.reverse()
+    return [cells[0:3], cells[3:6], cells[6:9]]